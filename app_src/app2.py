@@ -9,6 +9,8 @@ from pathlib import Path
 
 ## import built functions
 from src.func import parse_kml, generate_csv_from_gdf, convert_csv_to_gpkg
+from src.kml_cache import KmlCache
+from preprocess import load_schema_plan
 
 # --- Constants and Setup ---
 # Use /app/app_src (container's working directory) as base 
@@ -33,6 +35,7 @@ DEFAULT_TEMP_DIR = OUTPUT_BASE / "temp"
 DEFAULT_TEMP_DIR.mkdir(parents=True, exist_ok=True)
 TEMP_PREPROCESS_PATH = DEFAULT_TEMP_DIR / "temp_preprocess.gpkg"
 TEMP_CONVERTED_GPKG_PATH = DEFAULT_TEMP_DIR / "temp_converted.gpkg"
+KML_CACHE_DIR = OUTPUT_BASE / "cache" / "kml"
 
 
 # Load schema.json
@@ -45,13 +48,21 @@ def load_schema(file_path):
         st.warning(f"Configuration file not found")
 
 schema_data = load_schema(SCHEMA_FILE)
+# Every table of schema.json can be preprocessed and imported
+TABLE_OPTIONS = list(schema_data) if schema_data else ["ocorrencia", "manejo"]
+
+
+# Parsed KML cache, keyed by the file content (shared with preprocess.py --cache-dir)
+@st.cache_resource
+def get_kml_cache(cache_dir):
+    return KmlCache(cache_dir)
 
 
 def read_kml_data_and_columns(kml_path):
-    """Run the parse_kml function and returns the columns and geodataframe."""
+    """Run the parse_kml function (through the parse cache) and returns the columns and geodataframe."""
     st.info(f"Running reading kml ")
     print('This is func: read_kml_data_and_columns')
-    gdf = parse_kml(kml_path=kml_path)
+    gdf = get_kml_cache(KML_CACHE_DIR).parse(kml_path, parser=parse_kml)
     print(gdf)
     cols = gdf.columns.tolist()
     return cols, gdf
@@ -168,10 +179,10 @@ if current_step == "Step 1: Avenza File (kml)":
     st.subheader("File & Type Selection")
     
     uploaded_file = st.file_uploader(
-        "Upload KML File", 
-        type=['kml'],
+        "Upload KML/KMZ File", 
+        type=['kml', 'kmz'],
         key="kml_uploader",
-        help="Select the KML file to be analyzed."
+        help="Select the KML (or zipped KMZ) file to be analyzed. KMZ files are read directly, no need to unzip them."
     )
     
     if uploaded_file is not None:
@@ -347,7 +358,7 @@ elif current_step == "Pre-Processing":
     
     # 1. CASE TYPE SELECTION (MOVED TO TOP)
     st.subheader("Data Type Selection")
-    type_options = ["ocorrencia", "manejo"]
+    type_options = TABLE_OPTIONS
     # Use the selectbox here to define the type BEFORE the header and mapping logic
     st.selectbox(
         "Selecione a entrada de Dados: (Ocorrencia or Manejo)", 
@@ -420,7 +431,13 @@ elif current_step == "Pre-Processing":
         def print_cols(path):
             gdf = gpd.read_file(path)
             return gdf.columns.tolist()
-        st.info(f"The columns presented at the dataframe are: {print_cols(st.session_state.current_input_path)}")
+        input_cols = print_cols(st.session_state.current_input_path)
+        st.info(f"The columns presented at the dataframe are: {input_cols}")
+        # Plan only used for this caption (compiled once per schema.json version in the app process).
+        # The preprocessing itself runs preprocess.py in a subprocess, which compiles its own plan.
+        if case_type in (st.session_state.schema_data or {}):
+            plan = load_schema_plan(SCHEMA_FILE, case_type)
+            st.caption(f"Columns that reach the **{case_type}** table: {[c for c in input_cols if c in plan.rename]}")
     
     # --- Mapping and Run Logic (Based on the case_type set at the top) ---
     if st.session_state.schema_data and case_type in st.session_state.schema_data:
@@ -463,6 +480,11 @@ elif current_step == "Pre-Processing":
         st.divider()
         
         st.subheader("Run Preprocessing Script")
+        profile_run = st.checkbox(
+            "Profile preprocessing stages",
+            value=False,
+            help="Records wall/CPU time, peak memory growth and rows/s of each stage."
+        )
         
         if st.button("▶️ Run Preprocessing", type="primary"):
             
@@ -490,6 +512,8 @@ elif current_step == "Pre-Processing":
                 "--path-folder-name", st.session_state.output_path,
                 "--overwrite", "True"
             ]
+            if profile_run:
+                args.append("--profile")
 
             with st.spinner('Running the preprocessing script...'):
                 try:
@@ -502,6 +526,14 @@ elif current_step == "Pre-Processing":
                     st.session_state.processed_file_path = str(final_path) 
                     st.session_state.preprocessing_completed = True
                     st.session_state.manual_import_file_path = None
+
+                    # Stage profile, written by preprocess.py next to the output file
+                    profile_path = final_path.parent / f"{st.session_state.current_input_path.stem}.profile.json"
+                    if profile_run and profile_path.exists():
+                        with open(profile_path, "r", encoding="utf-8") as f:
+                            profile = json.load(f)
+                        st.markdown(f"**Stage profile** ({profile['rows']} rows, {profile['total_wall_s']:.2f}s total)")
+                        st.dataframe(pd.DataFrame(profile["stages"]), hide_index=True, width='stretch')
                     
                 except subprocess.CalledProcessError as e:
                     # Catch the specific non-zero exit error
@@ -541,7 +573,7 @@ elif current_step == "Pre-Processing":
 #                                 Database Import (Keep as is)
 # ==============================================================================
 elif current_step == "Database Import":
-    def run_db_import(file_path, case_type, host, port, database, user, password):
+    def run_db_import(file_path, case_type, host, port, database, user, password, upsert=False):
         os.environ['host'] = host
         os.environ['port'] = str(port)
         os.environ['database'] = database
@@ -552,7 +584,8 @@ elif current_step == "Database Import":
             "python", 
             DB_IMPORTER_SCRIPT,
             "--type", case_type,
-            "--file_name", str(file_path)
+            "--file_name", str(file_path),
+            "--mode", "upsert" if upsert else "append"
         ]
         
         try:
@@ -622,7 +655,7 @@ elif current_step == "Database Import":
     
     st.divider()
     st.subheader("Select the Table to be imported")
-    case_type_options = ["ocorrencia", "manejo"]
+    case_type_options = TABLE_OPTIONS
     case_type = st.selectbox(
         "Selecione em qual tabela será importado os arquivo.", 
         options=case_type_options,
@@ -652,6 +685,14 @@ elif current_step == "Database Import":
     st.text_input("Database Name", key="db_database")
     st.text_input("User", key="db_user")
     st.text_input("Password", type="password", key="db_password")
+    st.checkbox(
+        "Atualizar registros já importados (upsert)",
+        value=False,
+        key="db_upsert",
+        help="Re-importing a file writes only new or changed records (same date, time, especie and position). "
+             "Needs the opt-in natural key of database/migrate_natural_key.sql; "
+             "without it the import falls back to append."
+    )
 
     st.markdown("---")
     
@@ -668,5 +709,6 @@ elif current_step == "Database Import":
                 port=st.session_state.db_port,
                 database=st.session_state.db_database,
                 user=st.session_state.db_user,
-                password=st.session_state.db_password
+                password=st.session_state.db_password,
+                upsert=st.session_state.db_upsert
             )
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Benchmark of the preprocess -> GPKG export path with numpy/object columns
+(default plan) against `pd.ArrowDtype` columns (`--arrow` plan).
+Reports processing and write time, throughput and the memory of the processed frame.
+
+Run from `app_src/`:
+    python -m benchmarks.bench_arrow_dtypes --n 200000
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from loguru import logger
+
+from benchmarks.bench_kml_parsers import EXEMPLO_DIR, scale_kml
+from preprocess import load_schema_plan, process_gdf
+from src.func import parse_kml
+
+SCHEMA_FILE = Path(__file__).resolve().parents[1] / "config" / "schema.json"
+
+
+def run(gdf, plan, out_path, trace_memory=False):
+    """Process `gdf` with `plan` and write it; return (process s, write s, frame MB, peak MB)."""
+    if trace_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    gdf_out = process_gdf(gdf.copy(), plan)
+    t1 = time.perf_counter()
+    gdf_out.to_file(out_path, driver="GPKG", use_arrow=plan.arrow)
+    t2 = time.perf_counter()
+    peak = 0
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    frame_mb = gdf_out.drop(columns=gdf_out.geometry.name).memory_usage(deep=True).sum() / 1e6
+    return t1 - t0, t2 - t1, frame_mb, peak / 1e6
+
+
+def main(args):
+    # the Preprocessor logs every step, keep the benchmark output readable
+    logger.remove()
+    src = EXEMPLO_DIR / "Ocurrencia12.kml"
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        gdf = parse_kml(scale_kml(src, args.n, tmp / src.name))
+        print(f"{src.name} scaled to {len(gdf)} rows")
+
+        for arrow in (False, True):
+            plan = load_schema_plan(SCHEMA_FILE, "ocorrencia", arrow=arrow)
+            label = "arrow " if arrow else "numpy "
+            process_s, write_s, frame_mb, _ = run(gdf, plan, tmp / f"{label.strip()}.gpkg")
+            rows_s = len(gdf) / (process_s + write_s)
+            line = (f"  {label} process: {process_s:6.2f}s  write: {write_s:6.2f}s"
+                    f"  ({rows_s:9.0f} rows/s)  frame: {frame_mb:7.1f} MB")
+            if args.memory:
+                _, _, _, peak_mb = run(gdf, plan, tmp / f"{label.strip()}_mem.gpkg", trace_memory=True)
+                line += f"  peak python alloc: {peak_mb:7.1f} MB"
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of numpy vs Arrow dtypes in the preprocessing")
+    parser.add_argument("--n", type=int, default=200_000, help="Rows of the scaled input")
+    parser.add_argument("--memory", action="store_true", help="Also trace the peak of python allocations (slower)")
+    main(parser.parse_args())
@@ -0,0 +1,84 @@
+"""
+Benchmark of the picklist cleaning of `preprocess.Preprocessor.apply_cleaning`:
+the previous per-value `clean_txt` closure against the vectorized `clean_codes`,
+on columns built from the answers found in the `exemplo/` files.
+
+Run from `app_src/`:
+    python -m benchmarks.bench_cleaning --sizes 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_kml_parsers import EXEMPLO_DIR
+from preprocess import clean_codes
+from src.func import parse_kml
+
+# Cleaning columns of the ocorrencia table and their schema type
+COLUMNS = {"risco da invasao": "int", "estagio invasao": "int", "grau dispersao": "str", "zone": "int"}
+
+
+def clean_txt(txt):
+    """Previous cleaning, applied value by value."""
+    if pd.isna(txt):
+        return txt
+    s = str(txt).split('-')
+    if len(s) > 0:
+        return s[0].strip()
+    else:
+        return txt
+
+
+def clean_apply(values, dtype):
+    """Previous path: clean with `Series.apply`, then cast in apply_schema."""
+    out = values.apply(lambda x: clean_txt(x))
+    if dtype == "int":
+        out = pd.to_numeric(out, errors="coerce").astype("Int64")
+    return out
+
+
+def answers(col):
+    """Distinct answers of `col` in the example files, plus a missing value."""
+    values = set()
+    for src in sorted(EXEMPLO_DIR.glob("*.kml")):
+        gdf = parse_kml(src)
+        if col in gdf.columns:
+            values.update(gdf[col].dropna())
+    return sorted(values) + [None]
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = func()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    pools = {col: np.array(answers(col), dtype=object) for col in COLUMNS}
+
+    for n in args.sizes:
+        print(f"\n{n} rows")
+        for col, dtype in COLUMNS.items():
+            values = pd.Series(pools[col][rng.integers(0, len(pools[col]), n)], name=col)
+
+            before, expected = best_of(lambda: clean_apply(values, dtype), args.repeat)
+            after, out = best_of(lambda: clean_codes(values, dtype), args.repeat)
+            # both paths must agree value by value (NA included)
+            assert (out.isna() == expected.isna()).all()
+            assert (out[out.notna()].astype(str) == expected[expected.notna()].astype(str)).all()
+
+            print(f"  {col:<18} ({dtype:<3}) apply: {before:7.3f}s  clean_codes: {after:7.3f}s"
+                  f"  ({before / after:5.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of the picklist cleaning")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000], help="Rows per column")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per path, best is reported")
+    main(parser.parse_args())
@@ -0,0 +1,119 @@
+"""
+Benchmark of the DataImporter loaders against a local PostGIS: batched INSERTs
+(`execute_batch`, the default) against `COPY ... FROM STDIN` (`--loader copy`).
+Synthetic rows (typed as `cast_gdf_to_schema` returns them) are imported into a
+scratch copy of the table, in the `bench_loader` schema, which is dropped at the end.
+
+Needs the database of `docker compose up postgres` (tables of `database/create_db.sql`)
+and the connection variables of `db_importer.py` (host, port, database, user, password),
+e.g. from the `.env` file. Run from `app_src/`:
+    python -m benchmarks.bench_db_loader --n 10000 100000 1000000
+"""
+import argparse
+import datetime
+import os
+import time
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from loguru import logger
+from psycopg2 import sql
+from shapely import points
+
+from db_importer import DataImporter, cast_gdf_to_schema
+from src.validation import CARIJOS_BBOX
+
+BENCH_SCHEMA = "bench_loader"
+
+
+def synthetic_gdf(n: int, pg_schema: dict, seed: int = 0) -> gpd.GeoDataFrame:
+    """
+    `n` random rows for the columns of `pg_schema`, about 10% NULL outside the NOT NULL
+    columns, text with tabs/newlines/backslashes to exercise the COPY escaping, points in Carijós.
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col, pg_type in pg_schema.items():
+        if col in ("id", "geom", "created_at", "updated_at"):
+            continue
+        if pg_type == "integer":
+            values = pd.Series(rng.integers(0, 100, n), dtype="Int64")
+        elif pg_type in ("numeric", "real", "double precision"):
+            values = pd.Series(rng.random(n) * 100)
+        elif pg_type == "date":
+            values = pd.Series(pd.Timestamp("2025-11-01") + pd.to_timedelta(rng.integers(0, 60, n), unit="D"))
+            values = values.dt.strftime("%Y-%m-%d")
+        elif pg_type.startswith("time"):
+            seconds = rng.integers(0, 24 * 3600, n)
+            values = pd.Series([str(datetime.timedelta(seconds=int(s))).zfill(8) for s in seconds])
+        else:
+            values = pd.Series([f"{col} {i}\tcom tab\\ e\nlinha" for i in range(n)], dtype=object)
+        if col not in ("date", "time", "especie", "individuos"):
+            values = values.mask(rng.random(n) < 0.1)
+        data[col] = values
+    minx, miny, maxx, maxy = CARIJOS_BBOX
+    geometry = points(rng.uniform(minx, maxx, n), rng.uniform(miny, maxy, n))
+    return gpd.GeoDataFrame(data, geometry=geometry, crs="EPSG:4326")
+
+
+def main(args):
+    logger.remove()
+    load_dotenv()
+    db_config = {
+        "host": os.environ["host"],
+        "port": int(os.environ["port"]),
+        "database": os.environ["database"],
+        "user": os.environ["user"],
+        "password": os.environ["password"],
+    }
+    importer = DataImporter(db_config)
+    importer.connect()
+    cursor = importer.cursor
+    try:
+        cols = importer.get_cols_dtypes(args.table)
+        pg_schema = dict(zip(cols["cols"], cols["dtypes"]))
+
+        # scratch copy of the table, found first through the search_path
+        cursor.execute(sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(sql.Identifier(BENCH_SCHEMA)))
+        cursor.execute(sql.SQL("CREATE TABLE IF NOT EXISTS {}.{} (LIKE public.{} INCLUDING ALL)").format(
+            sql.Identifier(BENCH_SCHEMA), sql.Identifier(args.table), sql.Identifier(args.table)))
+        cursor.execute(sql.SQL("SET search_path TO {}, public").format(sql.Identifier(BENCH_SCHEMA)))
+        importer.conn.commit()
+
+        for n in args.n:
+            gdf = cast_gdf_to_schema(synthetic_gdf(n, pg_schema), pg_schema, inplace=True)
+            print(f"\n{args.table}: {n} rows")
+            for loader in args.loaders:
+                if loader == "insert" and n > args.max_insert_rows:
+                    print(f"  {loader:<7} skipped (> --max-insert-rows {args.max_insert_rows})")
+                    continue
+                cursor.execute(sql.SQL("TRUNCATE {}").format(sql.Identifier(args.table)))
+                importer.conn.commit()
+
+                importer.loader = loader
+                t0 = time.perf_counter()
+                importer.import_table(args.table, gdf)
+                elapsed = time.perf_counter() - t0
+
+                cursor.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(sql.Identifier(args.table)))
+                count = cursor.fetchone()[0]
+                assert count == n, f"{loader}: {count} rows in the table, expected {n}"
+                print(f"  {loader:<7} {elapsed:8.2f}s  ({n / elapsed:9.0f} rows/s)")
+    finally:
+        importer.conn.rollback()
+        cursor.execute(sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(sql.Identifier(BENCH_SCHEMA)))
+        importer.conn.commit()
+        importer.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of the INSERT and COPY loaders of db_importer")
+    parser.add_argument("--n", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="Rows per run")
+    parser.add_argument("--table", type=str, default="manejo", help="Table to load (a scratch copy of it)")
+    parser.add_argument("--loaders", nargs="+", choices=["insert", "copy"], default=["insert", "copy"],
+                        help="Loaders to compare")
+    parser.add_argument("--max-insert-rows", type=int, default=1_000_000,
+                        help="Skip the insert loader above this number of rows")
+    main(parser.parse_args())
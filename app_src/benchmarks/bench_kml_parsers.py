@@ -0,0 +1,85 @@
+"""
+Benchmark of the KML parsers of `src.func` on the `exemplo/` files scaled up.
+
+Run from `app_src/`:
+    python -m benchmarks.bench_kml_parsers --n 100000
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from src.func import parse_kml, parse_kml_columnar, parse_kml_geometries, parse_kml_with_logging
+
+EXEMPLO_DIR = Path(__file__).resolve().parents[2] / "exemplo"
+
+
+def scale_kml(src_path: Path, n_placemarks: int, out_path: Path) -> Path:
+    """
+    Write a copy of `src_path` whose Placemarks are repeated until there are
+    `n_placemarks` of them. Header (Schema, picklists) and footer are kept as is.
+    """
+    text = src_path.read_text(encoding="utf-8")
+    start = text.index("<Placemark>")
+    end = text.rindex("</Placemark>") + len("</Placemark>")
+    body = text[start:end]
+    n_body = body.count("<Placemark>")
+
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(text[:start])
+        for _ in range(n_placemarks // n_body):
+            f.write(body)
+        # close the last repetition with the first Placemarks of the body only
+        rest = n_placemarks % n_body
+        if rest:
+            cut = 0
+            for _ in range(rest):
+                cut = body.index("</Placemark>", cut) + len("</Placemark>")
+            f.write(body[:cut])
+        f.write(text[end:])
+    return out_path
+
+
+def run(func, *args, trace_memory=False, **kwargs):
+    """
+    Run `func` once and return (seconds, rows) or, with `trace_memory`, the peak
+    of python allocations in MB instead of the seconds (tracing slows the run down).
+    """
+    if trace_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    gdf = func(*args, **kwargs)
+    elapsed = time.perf_counter() - t0
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak / 1e6, len(gdf)
+    return elapsed, len(gdf)
+
+
+def main(args):
+    parsers = [
+        ("parse_kml", parse_kml, {}),
+        ("parse_kml_with_logging", parse_kml_with_logging, {"log": False}),
+        ("parse_kml(stream=True)", parse_kml, {"stream": True}),
+        ("parse_kml_columnar", parse_kml_columnar, {}),
+        ("parse_kml_geometries", parse_kml_geometries, {}),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        for src in sorted(EXEMPLO_DIR.glob("*.kml")):
+            scaled = scale_kml(src, args.n, Path(tmp) / src.name)
+            print(f"\n{src.name} scaled to {args.n} placemarks ({scaled.stat().st_size / 1e6:.1f} MB)")
+            print(f"{'parser':<26}{'seconds':>10}{'peak MB':>10}{'rows':>10}")
+            for name, func, kwargs in parsers:
+                elapsed, rows = min(run(func, scaled, **kwargs) for _ in range(args.repeat))
+                peak = run(func, scaled, trace_memory=True, **kwargs)[0] if args.memory else float("nan")
+                print(f"{name:<26}{elapsed:>10.2f}{peak:>10.1f}{rows:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of the KML parsers")
+    parser.add_argument("--n", type=int, default=100_000, help="Placemarks per scaled file")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per parser, best is reported")
+    parser.add_argument("--memory", action="store_true", help="Also report the peak of python allocations")
+    main(parser.parse_args())
@@ -0,0 +1,63 @@
+"""
+Per-placemark timing of the descendant searches used before `read_placemark`
+(one `.//k:` search per element) against the single walk of `src.func.read_placemark`.
+
+Run from `app_src/`:
+    python -m benchmarks.bench_placemark_traversal --n 20000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from lxml import etree
+
+from benchmarks.bench_kml_parsers import EXEMPLO_DIR, scale_kml
+from src.func import read_placemark
+
+
+def searches_per_element(placemark, ns):
+    """Previous access pattern: every lookup rescans the Placemark subtree."""
+    name = placemark.findtext(".//k:name", default=None, namespaces=ns)
+    when = placemark.findtext(".//k:when", default=None, namespaces=ns)
+    coords_text = placemark.findtext(".//k:coordinates", default=None, namespaces=ns)
+    schema_data = placemark.find(".//k:SchemaData", ns)
+    schema_url = schema_data.get("schemaUrl") if schema_data is not None else None
+    simple_data = [(sd.get("name"), sd.text) for sd in placemark.findall(".//k:SimpleData", ns)]
+    return name, when, coords_text, schema_url, simple_data
+
+
+def time_per_placemark(func, placemarks, repeat):
+    """Best of `repeat` runs over all the placemarks, in microseconds per placemark."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for placemark in placemarks:
+            func(placemark)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(placemarks) * 1e6
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        for src in sorted(EXEMPLO_DIR.glob("*.kml")):
+            scaled = scale_kml(src, args.n, Path(tmp) / src.name)
+            root = etree.parse(str(scaled)).getroot()
+            ns = {"k": root.nsmap.get(None, "http://www.opengis.net/kml/2.2")}
+            placemarks = root.findall(".//k:Placemark", ns)
+
+            # both access patterns must read the same values
+            assert all(searches_per_element(p, ns) == read_placemark(p) for p in placemarks)
+
+            before = time_per_placemark(lambda p: searches_per_element(p, ns), placemarks, args.repeat)
+            after = time_per_placemark(read_placemark, placemarks, args.repeat)
+            print(f"\n{src.name} ({len(placemarks)} placemarks)")
+            print(f"  .//k: search per element : {before:8.2f} us/placemark")
+            print(f"  read_placemark (one walk): {after:8.2f} us/placemark  ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-placemark timing of the KML traversal")
+    parser.add_argument("--n", type=int, default=20_000, help="Placemarks per scaled file")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per pattern, best is reported")
+    main(parser.parse_args())
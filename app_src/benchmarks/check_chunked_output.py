@@ -0,0 +1,77 @@
+"""
+Regression check of the chunked preprocessing (`preprocess.py --chunk-size`): every example
+KML is processed in small batches and as a whole file, in numpy and `--arrow` mode, to GPKG
+and GeoParquet, and the chunked output read back (the whole folder of part files for
+GeoParquet) must equal the whole-file one. Batches that lack a column, or
+have their columns in another order, must still write the fields of the first batch.
+Both runs write to the same path, the chunked one over the whole-file output and a second
+whole-file run over the chunked output, as re-running preprocess.py does.
+Exits with status 1 when an output differs or a run fails.
+
+Run from `app_src/`:
+    python -m benchmarks.check_chunked_output --chunk-size 10
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+from itertools import product
+from pathlib import Path
+
+import geopandas as gpd
+import pandas as pd
+
+from benchmarks.bench_kml_parsers import EXEMPLO_DIR
+
+APP_DIR = Path(__file__).resolve().parents[1]
+
+
+def run_preprocess(src, out_dir, folder, table, options):
+    """Run preprocess.py on `src`; return the output file, or raise with its log."""
+    args = [sys.executable, "preprocess.py", "--type", table, "--file", str(src),
+            "--path-folder-name", str(out_dir), "--folder-name", folder, "--output-file-name", src.stem,
+            "--cache-dir", str(out_dir / "cache"), *options]
+    result = subprocess.run(args, cwd=APP_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stdout[-2000:] + result.stderr[-2000:])
+    return out_dir / folder / f"{src.stem}.{options[options.index('--format') + 1]}"
+
+
+def read_output(path):
+    """Processed output as a GeoDataFrame: a GPKG, or a GeoParquet file or folder of part files."""
+    return gpd.read_parquet(path) if path.suffix == ".parquet" else gpd.read_file(path)
+
+
+def main(args):
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for src in sorted(EXEMPLO_DIR.glob("*.kml")):
+            for output_format, flags in product(("gpkg", "parquet"), ([], ["--arrow"])):
+                options = ["--format", output_format, *flags]
+                label = f"{src.name} {' '.join(options)}"
+                try:
+                    whole = read_output(run_preprocess(src, tmp, "out", args.type, options))
+                    chunked = read_output(run_preprocess(src, tmp, "out", args.type,
+                                                         options + ["--chunk-size", str(args.chunk_size)]))
+                    # the streaming and whole-file KML parsers order the columns differently
+                    pd.testing.assert_frame_equal(chunked[whole.columns], whole)
+                    pd.testing.assert_frame_equal(read_output(run_preprocess(src, tmp, "out", args.type, options)),
+                                                  whole)
+                except Exception as e:
+                    failures.append(f"{label}: {e}")
+                    print(f"  FAIL {label}")
+                    continue
+                print(f"  ok   {label} ({len(whole)} rows)")
+
+    if failures:
+        print("\n" + "\n".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regression check of the chunked preprocessing output")
+    parser.add_argument("--chunk-size", type=int, default=10, help="Rows per batch of the chunked runs")
+    parser.add_argument("--type", type=str, default="ocorrencia", help="Table plan to apply")
+    main(parser.parse_args())
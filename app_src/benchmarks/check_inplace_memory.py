@@ -0,0 +1,95 @@
+"""
+Memory regression check of the copy-minimizing importer cast
+(`db_importer.cast_gdf_to_schema(inplace=True)`), on the frame read back from a processed
+GPKG. The peak of Python allocations of the inplace cast must stay under `--max-ratio`
+times the size of that frame, and under `--max-cast-ratio` times the peak of the default
+(copying) cast. Exits with status 1 when a limit is exceeded.
+
+Run from `app_src/`:
+    python -m benchmarks.check_inplace_memory --n 50000
+"""
+import argparse
+import json
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import geopandas as gpd
+from loguru import logger
+
+from benchmarks.bench_kml_parsers import EXEMPLO_DIR, scale_kml
+from db_importer import cast_gdf_to_schema
+from preprocess import load_schema_plan, process_gdf
+from src.func import parse_kml
+
+SCHEMA_FILE = Path(__file__).resolve().parents[1] / "config" / "schema.json"
+
+# `data_type_db` of schema.json -> data_type reported by information_schema
+PG_TYPES = {"INTEGER": "integer", "REAL": "real", "DATE": "date", "TIME": "time without time zone",
+            "VARCHAR": "character varying", "TEXT": "text", "geometry": "USER-DEFINED"}
+
+
+def pg_schema(table):
+    """Column -> postgres type of `table`, as `DataImporter.get_cols_dtypes` would return it."""
+    with open(SCHEMA_FILE, "r", encoding="utf-8") as f:
+        mappings = json.load(f)[table]["mappings"]
+    return {m["db_column"]: PG_TYPES[m["data_type_db"].split("(")[0]]
+            for m in mappings if m["db_column"] != "None"}
+
+
+def peak_mb(func, gdf, **kwargs):
+    """Peak of Python allocations (MB) while `func` runs on a copy of `gdf`."""
+    gdf = gdf.copy()
+    tracemalloc.start()
+    func(gdf, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def check(name, default_mb, inplace_mb, input_mb, max_ratio, max_default_ratio, failures):
+    ratio = inplace_mb / input_mb
+    default_ratio = inplace_mb / default_mb
+    print(f"  default: {default_mb:7.1f} MB  inplace: {inplace_mb:7.1f} MB"
+          f"  ({ratio:.2f}x input, limit {max_ratio}x; {default_ratio:.2f}x default, limit {max_default_ratio}x)")
+    if ratio > max_ratio:
+        failures.append(f"{name}: {ratio:.2f}x input > {max_ratio}x")
+    if default_ratio > max_default_ratio:
+        failures.append(f"{name}: {default_ratio:.2f}x default > {max_default_ratio}x")
+
+
+def main(args):
+    logger.remove()
+    with tempfile.TemporaryDirectory() as tmp:
+        failures = []
+        for src in sorted(EXEMPLO_DIR.glob("*.kml")):
+            gdf = parse_kml(scale_kml(src, args.n, Path(tmp) / src.name))
+
+            # frame as db_importer reads it back from the GPKG
+            out_path = Path(tmp) / f"{src.stem}.gpkg"
+            process_gdf(gdf, load_schema_plan(SCHEMA_FILE, args.type)).to_file(out_path)
+            gdf_db = gpd.read_file(out_path)
+            db_mb = gdf_db.memory_usage(deep=True).sum() / 1e6
+            print(f"\n{src.name}: {len(gdf_db)} rows, frame read back {db_mb:.1f} MB")
+
+            schema = pg_schema(args.type)
+            default_mb = peak_mb(cast_gdf_to_schema, gdf_db, pg_schema=schema)
+            inplace_mb = peak_mb(cast_gdf_to_schema, gdf_db, pg_schema=schema, inplace=True)
+            check(src.name, default_mb, inplace_mb, db_mb, args.max_ratio, args.max_cast_ratio, failures)
+
+    if failures:
+        print("\ninplace peak allocations above the limit:\n" + "\n".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory regression check of the inplace importer cast")
+    parser.add_argument("--n", type=int, default=50_000, help="Rows of the scaled inputs")
+    parser.add_argument("--type", type=str, default="ocorrencia", help="Table plan to apply")
+    parser.add_argument("--max-ratio", type=float, default=3.0,
+                        help="Allowed inplace cast peak as a multiple of the frame size")
+    parser.add_argument("--max-cast-ratio", type=float, default=0.8,
+                        help="Allowed inplace cast peak as a multiple of the default cast peak")
+    main(parser.parse_args())
@@ -2,29 +2,280 @@ import geopandas as gpd
 import psycopg2
 from psycopg2 import sql
 from psycopg2.extras import execute_batch
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, Sequence
 from pathlib import Path
 from loguru import logger
 import os
 from dotenv import load_dotenv
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import shapely
+import io
+import json
 import sys # <-- ADDED: Import sys for standard output redirection
 
+from src.dedup import DedupIndex, record_keys
+from src.timeofday import parse_time_of_day, seconds_to_time
+from src.validation import validate_gdf
+
+# Rows per COPY statement of the copy loader
+COPY_CHUNK_ROWS = 50_000
+# COPY text format escapes, backslash first
+COPY_ESCAPES = (("\\", "\\\\"), ("\t", "\\t"), ("\n", "\\n"), ("\r", "\\r"))
+
+# Unified schema of the preprocessing: the columns written for each table
+SCHEMA_FILE = Path(__file__).resolve().parent / "config" / "schema.json"
+# Columns filled by their DEFAULT, never imported
+DB_DEFAULT_COLUMNS = ('created_at', 'updated_at')
+# Value of a geometry column: hex WKB, as returned by `geometry_hex`
+GEOMETRY_VALUE = "ST_GeomFromWKB({}::geometry, 4326)"
+# Natural key of a record for the upsert: device timestamp, position and species.
+# Needs the opt-in unique index "<table>_natural_key" of database/migrate_natural_key.sql
+NATURAL_KEY = ('date', 'time', 'especie', 'geom')
+# The geometry enters the key as a digest: a btree on the raw geometry stores it whole,
+# and large polygons exceed the maximum size of an index row
+NATURAL_KEY_GEOMETRY = "md5(ST_AsEWKB({}))"
+
+
+def geometry_hex(geometries, ewkb: bool = False, srid: int = 4326) -> np.ndarray:
+    """
+    Hex WKB of all the geometries at once (None for missing or empty ones).
+    `ewkb` adds the SRID (EWKB), the text a geometry column reads as is in COPY.
+    """
+    geometries = np.asarray(geometries, dtype=object)
+    if ewkb:
+        geometries = shapely.set_srid(geometries, srid)
+    values = shapely.to_wkb(geometries, hex=True, include_srid=ewkb)
+    values[shapely.is_missing(geometries) | shapely.is_empty(geometries)] = None
+    return values
+
+
+def record_columns(gdf: gpd.GeoDataFrame, columns: Sequence[str], first_id: Optional[int], ewkb: bool = False,
+                   geometry: str = 'geom') -> list:
+    """
+    Source array of each record column, in the order of `columns`: `id` (only for tables
+    without an identity column) numbered from `first_id`, the `geometry` column as hex WKB/EWKB (`geometry_hex`) of the active gdf
+    geometry, the gdf column of the same name, or None for columns the gdf does not have.
+    """
+    n_rows = len(gdf)
+    arrays = []
+    for col in columns:
+        if col == 'id':
+            arrays.append(np.arange(first_id, first_id + n_rows, dtype=np.int64))
+        elif col == geometry:
+            arrays.append(geometry_hex(gdf.geometry.values, ewkb))
+        elif col in gdf.columns:
+            arrays.append(gdf[col])
+        else:
+            arrays.append(np.full(n_rows, None, dtype=object))
+    return arrays
+
+
+def python_values(values) -> np.ndarray:
+    """Object array of python scalars with None for every NA, what the DB driver adapts."""
+    out = values.to_numpy(dtype=object) if isinstance(values, pd.Series) else np.asarray(values, dtype=object)
+    missing = pd.isna(out)
+    # the array can be a read-only view of the column: replace into a new one
+    return np.where(missing, None, out) if missing.any() else out
+
+
+def iter_records(gdf: gpd.GeoDataFrame, columns: Sequence[str], first_id: Optional[int],
+                 geometry: str = 'geom') -> Iterator[tuple]:
+    """
+    Record tuples for `execute_batch`, zipped from one array per column: no pandas
+    object is built per row.
+    """
+    return zip(*(python_values(values) for values in record_columns(gdf, columns, first_id, geometry=geometry)))
+
+
+def copy_text_array(values) -> pa.Array:
+    """One column in the COPY text format: \\N for NULL, escaped text otherwise."""
+    try:
+        arr = pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # object column of mixed types: the text of each value
+        values = python_values(values)
+        arr = pa.array([None if v is None else str(v) for v in values], type=pa.string())
+    if pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type):
+        for char, escaped in COPY_ESCAPES:
+            arr = pc.replace_substring(arr, char, escaped)
+    arr = pc.cast(arr, pa.string())
+    return pc.fill_null(arr, "\\N")
+
+
+def copy_chunks(gdf: gpd.GeoDataFrame, columns: Sequence[str], first_id: Optional[int],
+                chunk_rows: int = COPY_CHUNK_ROWS, geometry: str = 'geom') -> Iterator[io.BytesIO]:
+    """
+    COPY text buffers of the records, `chunk_rows` rows each, formatted column by column
+    with pyarrow kernels: no python object is built per row or value.
+    """
+    arrays = record_columns(gdf, columns, first_id, ewkb=True, geometry=geometry)
+    for start in range(0, len(gdf), chunk_rows):
+        stop = start + chunk_rows
+        text = [copy_text_array(values[start:stop]) for values in arrays]
+        lines = pc.binary_join_element_wise(*text, "\t")
+        # "line\n" for every row, joined into a single string
+        lines = pc.binary_join_element_wise(lines, "", "\n")
+        chunk = pc.binary_join(pa.ListArray.from_arrays([0, len(lines)], lines), "")[0]
+        yield io.BytesIO(chunk.as_buffer())
+
+
+def schema_db_columns(table_name: str, schema_file: Path = SCHEMA_FILE) -> list:
+    """
+    DB columns the preprocessing writes for `table_name`: the `db_column` of its
+    `schema.json` mappings, without the ones mapped to "None".
+    """
+    with open(schema_file, 'r', encoding='utf-8') as f:
+        schema_unif = json.load(f)
+    if table_name not in schema_unif:
+        raise ValueError(f"Unknown table '{table_name}'. Must be one of: {', '.join(schema_unif)}")
+    return [m['db_column'] for m in schema_unif[table_name]['mappings'] if m['db_column'] != 'None']
+
+
+def schema_tables(schema_file: Path = SCHEMA_FILE) -> list:
+    """Tables of `schema.json`, the types that can be preprocessed and imported."""
+    with open(schema_file, 'r', encoding='utf-8') as f:
+        return list(json.load(f))
+
+
+@dataclass(frozen=True)
+class ImportPlan():
+    """
+    Compiled import of a table: the columns of its records and the INSERT and COPY
+    statements, built once from the table (`information_schema`) and `schema.json`.
+
+    Attributes:
+        table: str
+            Destination table.
+        columns: tuple
+            Table columns written by the preprocessing, in table order, after `id` when the
+            table does not generate it (databases created before its identity column).
+        geometry: str
+            Geometry column, sent as hex WKB ("" when the table has none).
+        insert: sql.Composed
+            INSERT of one record, for `execute_batch`.
+        copy: sql.Composed
+            COPY ... FROM STDIN of the columns, for `copy_records`.
+        stage_create: sql.Composed
+            CREATE of the TEMP staging table of the upsert, dropped on commit.
+        stage_copy: sql.Composed
+            COPY ... FROM STDIN into the staging table.
+        upsert: sql.Composed
+            INSERT ... ON CONFLICT of the staged records on NATURAL_KEY, returning the
+            number of inserted and updated rows. None when the table lacks a key column.
+    """
+    table: str
+    columns: tuple
+    geometry: str
+    insert: sql.Composed
+    copy: sql.Composed
+    stage_create: Optional[sql.Composed] = None
+    stage_copy: Optional[sql.Composed] = None
+    upsert: Optional[sql.Composed] = None
+
+
+def build_import_plan(table_name: str, cols_dtypes: dict, schema_columns: Sequence[str]) -> ImportPlan:
+    """
+    Build the `ImportPlan` of a table.
+    
+    Args:
+        table_name: Name of the table
+        cols_dtypes: Columns and dtypes of the table (see `DataImporter.get_cols_dtypes`)
+        schema_columns: DB columns written by the preprocessing (see `schema_db_columns`)
+        
+    Returns:
+        ImportPlan
+    """
+    if not cols_dtypes['cols']:
+        raise ValueError(f"Table '{table_name}' not found in the database")
+    schema_columns = set(schema_columns)
+    generated = dict(zip(cols_dtypes['cols'], cols_dtypes.get('generated', [False] * len(cols_dtypes['cols']))))
+    if not generated.get('id', False):
+        logger.warning(f"{table_name}.id is not an identity column: ids are numbered from MAX(id), "
+                       f"which is not safe for concurrent imports. Run database/migrate_identity_id.sql")
+    columns, geometry = [], ''
+    for col, dtype in zip(cols_dtypes['cols'], cols_dtypes['dtypes']):
+        if col in DB_DEFAULT_COLUMNS or generated[col] or (col != 'id' and col not in schema_columns):
+            continue
+        if dtype == 'USER-DEFINED':
+            geometry = col
+        columns.append(col)
+    
+    not_in_table = sorted(schema_columns - set(cols_dtypes['cols']))
+    if not_in_table:
+        logger.warning(f"Columns of schema.json not in table {table_name}, not imported: {not_in_table}")
+    
+    values = [sql.SQL(GEOMETRY_VALUE).format(sql.Placeholder()) if col == geometry else sql.Placeholder()
+              for col in columns]
+    column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+    insert = sql.SQL("INSERT INTO {} ({}) VALUES ({})").format(
+        sql.Identifier(table_name), column_list, sql.SQL(", ").join(values)
+    )
+    copy = sql.SQL("COPY {} ({}) FROM STDIN").format(sql.Identifier(table_name), column_list)
+    logger.debug(f"Import plan of {table_name}: {columns}")
+    if not set(NATURAL_KEY) <= set(columns):
+        return ImportPlan(table_name, tuple(columns), geometry, insert, copy)
+    
+    # Upsert: COPY into a TEMP table (no WAL, private to the session), then a single
+    # set-based INSERT ... ON CONFLICT. The last record of each key in the file wins,
+    # rows are only rewritten when a value changed.
+    table, stage = sql.Identifier(table_name), sql.Identifier(f"stage_{table_name}")
+    # same expressions as the unique index, so ON CONFLICT infers it
+    key = sql.SQL(", ").join(sql.SQL(NATURAL_KEY_GEOMETRY).format(sql.Identifier(col)) if col == geometry
+                             else sql.Identifier(col) for col in NATURAL_KEY)
+    changing = [col for col in columns if col not in NATURAL_KEY and col != 'id']
+    assignments = [sql.SQL("{} = EXCLUDED.{}").format(sql.Identifier(col), sql.Identifier(col)) for col in changing]
+    if 'updated_at' in cols_dtypes['cols']:
+        assignments.append(sql.SQL("{} = CURRENT_TIMESTAMP").format(sql.Identifier('updated_at')))
+    stage_create = sql.SQL("CREATE TEMP TABLE {} ON COMMIT DROP AS SELECT {} FROM {} WITH NO DATA").format(
+        stage, column_list, table
+    )
+    stage_copy = sql.SQL("COPY {} ({}) FROM STDIN").format(stage, column_list)
+    conflict = sql.SQL("DO NOTHING")
+    if changing:
+        conflict = sql.SQL("DO UPDATE SET {} WHERE ({}) IS DISTINCT FROM ({})").format(
+            sql.SQL(", ").join(assignments),
+            sql.SQL(", ").join(sql.SQL("t.{}").format(sql.Identifier(col)) for col in changing),
+            sql.SQL(", ").join(sql.SQL("EXCLUDED.{}").format(sql.Identifier(col)) for col in changing),
+        )
+    # xmax = 0 only for the rows inserted by the statement
+    upsert = sql.SQL("""
+        WITH upserted AS (
+            INSERT INTO {table} AS t ({columns})
+            SELECT DISTINCT ON ({key}) {columns} FROM {stage} ORDER BY {key}, ctid DESC
+            ON CONFLICT ({key}) {conflict}
+            RETURNING xmax = 0 AS inserted
+        )
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM upserted
+    """).format(table=table, columns=column_list, key=key, stage=stage, conflict=conflict)
+    return ImportPlan(table_name, tuple(columns), geometry, insert, copy, stage_create, stage_copy, upsert)
+
 
 class DataImporter:
     """Import GPKG data into PostgreSQL/PostGIS database tables."""
     
-    def __init__(self, db_config: Dict[str, Any]):
+    def __init__(self, db_config: Dict[str, Any], loader: str = 'insert', copy_chunk_rows: int = COPY_CHUNK_ROWS):
         """
         Initialize the importer with database configuration.
         
         Args:
             db_config: Dictionary with keys: host, port, database, user, password
+            loader: 'insert' (execute_batch of INSERTs) or 'copy' (COPY ... FROM STDIN, bulk load)
+            copy_chunk_rows: Rows buffered in memory per COPY statement of the copy loader
         """
+        if loader not in ('insert', 'copy'):
+            raise ValueError(f"Unknown loader '{loader}'. Must be 'insert' or 'copy'")
         self.db_config = db_config
+        self.loader = loader
+        self.copy_chunk_rows = copy_chunk_rows
         self.conn = None
         self.cursor = None
+        # ImportPlan per table, see get_import_plan
+        self._plans = {}
         
     def connect(self):
         """Establish database connection."""
@@ -70,7 +321,8 @@ class DataImporter:
         """
         Get the columns, dtypes and boolean information of nullables for each
         column of the table.
-        Returns a dict with keys of cols, dtypes and nullable
+        Returns a dict with keys of cols, dtypes, nullable and generated (True for
+        identity columns and columns defaulting to a sequence: the server assigns them)
         Args:
             table_name: str
                 Name of the table
@@ -78,7 +330,7 @@ class DataImporter:
         dict_out = {}
         try: 
             query = sql.SQL("""
-                             SELECT column_name, data_type, is_nullable
+                             SELECT column_name, data_type, is_nullable, is_identity, column_default
                                  FROM information_schema.columns
                                  WHERE table_name = {} 
                                  AND table_schema = 'public'
@@ -95,6 +347,7 @@ class DataImporter:
             dict_out['cols'] = [row[0] for row in rows]
             dict_out['dtypes'] = [row[1] for row in rows] 
             dict_out['nullable'] = [row[2] for row in rows] 
+            dict_out['generated'] = [row[3] == 'YES' or str(row[4] or '').startswith('nextval(') for row in rows]
             
             
         except Exception as e:
@@ -103,132 +356,161 @@ class DataImporter:
         
         return dict_out
     
-    def import_ocorrencia(self, gdf: gpd.GeoDataFrame, layer_name: Optional[str] = None):
+    def _next_id(self, plan: ImportPlan) -> Optional[int]:
+        """
+        First id of the records. ids come from the identity sequence of the table, assigned
+        by the server row by row: concurrent imports never collide. MAX(id) only for legacy tables.
+        """
+        return self.get_max_id(plan.table) + 1 if 'id' in plan.columns else None
+    
+    def get_import_plan(self, table_name: str, cols_dtypes: Optional[dict] = None) -> ImportPlan:
         """
-        Import data from GPKG file into ocorrencia table.
+        Import plan of a table, built on first use and cached for the life of the importer.
         
+        Args:
+            table_name: Name of the table
+            cols_dtypes: Output of `get_cols_dtypes` when already fetched. Default None, query it.
+            
+        Returns:
+            ImportPlan
         """
-        gdf = gdf.copy()
-        try:          
-            # Get next ID
-            max_id = self.get_max_id('ocorrencia')
-            next_id = max_id + 1
+        if table_name not in self._plans:
+            if cols_dtypes is None:
+                cols_dtypes = self.get_cols_dtypes(table_name)
+            self._plans[table_name] = build_import_plan(table_name, cols_dtypes, schema_db_columns(table_name))
+        return self._plans[table_name]
+    
+    def copy_records(self, plan: ImportPlan, gdf: gpd.GeoDataFrame, first_id: Optional[int] = None,
+                     staging: bool = False) -> int:
+        """
+        Stream the records of `gdf` into a table with COPY ... FROM STDIN, one in-memory
+        buffer of `copy_chunk_rows` rows per COPY (see `copy_chunks`). Runs in the current
+        transaction: the caller commits or rolls back.
+        
+        Args:
+            plan: Import plan of the table
+            gdf: GeoDataFrame cast to the table schema
+            first_id: id of the first record, when `id` is in the plan columns
+            staging: Copy into the staging table of the upsert instead of the table
             
-            # Prepare data for insertion
-            records = []
-            for idx, row in gdf.iterrows():
-                record = (
-                    next_id + idx,
-                    row.get('name'),
-                    row.get('elevation'),
-                    row.get('date'),
-                    row.get('time'),
-                    row['especie'],
-                    row.get('nivel_prioridade'),
-                    row.get('risco_invasao'),
-                    row.get('estagio_invasao'),
-                    row.get('grau_dispersao'),
-                    row['individuos'],
-                    row.get('zona'),
-                    row.get('area_degradada'),
-                    row.geometry.wkb_hex if row.geometry else None,
-                    row.get('comentario'),
-                    row.get('description')
-                )
-                records.append(record)
+        Returns:
+            Number of rows copied
+        """
+        query = plan.stage_copy if staging else plan.copy
+        n_rows = 0
+        for buffer in copy_chunks(gdf, plan.columns, first_id, self.copy_chunk_rows, plan.geometry):
+            self.cursor.copy_expert(query, buffer)
+            n_rows = min(n_rows + self.copy_chunk_rows, len(gdf))
+            logger.debug(f"Copied {n_rows} rows into {plan.table}")
+        return n_rows
+    
+    def import_table(self, table_name: str, gdf: gpd.GeoDataFrame):
+        """
+        Import a GeoDataFrame cast to the table schema into any table of `schema.json`,
+        with the columns and statements of its import plan (see `get_import_plan`).
+        
+        Args:
+            table_name: Name of the table
+            gdf: gdf object
+        """
+        # read-only below: no defensive copy of the frame
+        try:
+            plan = self.get_import_plan(table_name)
             
-            # Insert records
-            insert_query = """
-                INSERT INTO ocorrencia (
-                    id, name, elevation, date, time, especie, nivel_prioridade,
-                    risco_invasao, estagio_invasao, grau_dispersao, individuos,
-                    zona, area_degradada, geom, comentario, description
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 
-                    ST_GeomFromWKB(%s::geometry, 4326), %s, %s
-                )
-            """
+            next_id = self._next_id(plan)
             
-            execute_batch(self.cursor, insert_query, records, page_size=100)
+            # records built column-wise, in the order of plan.columns
+            if self.loader == 'copy':
+                self.copy_records(plan, gdf, next_id)
+            else:
+                # rendered once: execute_batch would render a Composed for every record
+                insert_query = plan.insert.as_string(self.cursor)
+                records = iter_records(gdf, plan.columns, next_id, plan.geometry)
+                execute_batch(self.cursor, insert_query, records, page_size=100)
             self.conn.commit()
             
-            logger.info(f"Successfully imported {len(records)} records into ocorrencia")
+            logger.info(f"Successfully imported {len(gdf)} records into {table_name}")
             
         except Exception as e:
             self.conn.rollback()
-            logger.error(f"Error importing ocorrencia data: {e}")
+            logger.error(f"Error importing {table_name} data: {e}")
             raise
     
-    def import_manejo(self, gdf: gpd.GeoDataFrame):
+    def has_natural_key(self, table_name: str) -> bool:
         """
-        Import data from GPKG file into manejo table.
+        Whether the table has the unique index "<table>_natural_key" on NATURAL_KEY, with the
+        geometry digest of NATURAL_KEY_GEOMETRY, which INSERT ... ON CONFLICT needs (see
+        database/migrate_natural_key.sql). The plain UNIQUE constraint on the raw geometry of
+        earlier versions of create_db.sql does not count: the migration replaces it.
         
         Args:
+            table_name: Name of the table
+        """
+        query = """
+            SELECT EXISTS (
+                SELECT 1 FROM pg_index i
+                WHERE i.indexrelid = to_regclass(%s) AND i.indrelid = %s::regclass
+                AND i.indisunique AND i.indexprs IS NOT NULL
+            )
+        """
+        self.cursor.execute(query, (f'"{table_name}_natural_key"', table_name))
+        return self.cursor.fetchone()[0]
+    
+    def upsert_table(self, table_name: str, gdf: gpd.GeoDataFrame) -> tuple:
+        """
+        Idempotent import: bulk load the records into a TEMP staging table with COPY, then
+        insert the new ones and update the changed ones (bumping `updated_at`) in a single
+        INSERT ... ON CONFLICT on NATURAL_KEY. Re-importing the same file writes nothing.
+        Tables without the natural key constraint (databases not migrated yet) fall back to
+        `import_table`, with a warning.
+        
+        Args:
+            table_name: Name of the table
             gdf: gdf object
+            
+        Returns:
+            (inserted, updated) number of rows
         """
-        gdf = gdf.copy()
+        plan = self.get_import_plan(table_name)
+        if plan.upsert is None:
+            raise ValueError(f"Table {table_name} does not have the natural key columns {NATURAL_KEY}")
+        if not self.has_natural_key(table_name):
+            logger.warning(f"Table {table_name} has no unique index on {NATURAL_KEY}: importing in "
+                           f"append mode. Run database/migrate_natural_key.sql to enable the upsert")
+            self.import_table(table_name, gdf)
+            return len(gdf), 0
+        
         try:
-            # Get next ID
-            max_id = self.get_max_id('manejo')
-            next_id = max_id + 1
-            
-            # Prepare data for insertion
-            records = []
-            for idx, row in gdf.iterrows():
-                record = (
-                    next_id + idx,
-                    row.get('name'),
-                    row.get('elevation'),
-                    row.get('date'),
-                    row.get('time'),
-                    row.get('tipo_acao'),
-                    row.get('zona'),
-                    row.get('especie'),
-                    row.get('status_remocao'),
-                    row.get('individuos'),
-                    row.get('plantulas_rev'),
-                    row.get('jovens_rev'),
-                    row.get('adultos_rev'),
-                    row.get('metodo_controle'),
-                    row.get('mec_controle'),
-                    row.get('principio_ativo'),
-                    row.get('quimic_concentr'),
-                    row.get('quimic_l'),
-                    row.get('inicio'),
-                    row.get('fim'),
-                    row.get('num_manej'),
-                    row.get('num_equipe'),
-                    row.get('custo'),
-                    row.geometry.wkb_hex if row.geometry else None,
-                    row.get('comentario'),
-                    row.get('description')
-                )
-                records.append(record)
-            
-            # Insert records
-            insert_query = """
-                INSERT INTO manejo (
-                    id, name, elevation, date, time, tipo_acao, zona, especie,
-                    status_remocao, individuos, plantulas_rev, jovens_rev, adultos_rev,
-                    metodo_controle, mec_controle, principio_ativo, quimic_concentr,
-                    quimic_l, inicio, fim, num_manej, num_equipe, custo, geom,
-                    comentario, description
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s, %s, %s, %s, ST_GeomFromWKB(%s::geometry, 4326),
-                    %s, %s
-                )
-            """
-            
-            execute_batch(self.cursor, insert_query, records, page_size=100)
+            self.cursor.execute(plan.stage_create)
+            self.copy_records(plan, gdf, self._next_id(plan), staging=True)
+            self.cursor.execute(plan.upsert)
+            inserted, updated = self.cursor.fetchone()
             self.conn.commit()
             
-            logger.info(f"Successfully imported {len(records)} records into manejo")
+            logger.info(f"Upserted {len(gdf)} records into {table_name}: {inserted} new, {updated} changed, "
+                        f"{len(gdf) - inserted - updated} unchanged or repeated")
+            return inserted, updated
             
         except Exception as e:
             self.conn.rollback()
-            logger.error(f"Error importing manejo data: {e}")
+            logger.error(f"Error upserting {table_name} data: {e}")
             raise
+    
+    def import_ocorrencia(self, gdf: gpd.GeoDataFrame, layer_name: Optional[str] = None):
+        """
+        Import data from GPKG file into ocorrencia table (see `import_table`).
+        
+        """
+        self.import_table('ocorrencia', gdf)
+    
+    def import_manejo(self, gdf: gpd.GeoDataFrame):
+        """
+        Import data from GPKG file into manejo table (see `import_table`).
+        
+        Args:
+            gdf: gdf object
+        """
+        self.import_table('manejo', gdf)
 
 
 def validate_file(file_path: Path) -> bool:
@@ -295,19 +577,21 @@ def get_pandas_dtype_map() -> Dict[str, str]:
         'USER-DEFINED': None,  # Skip geometry and custom types
     }
 
-def cast_gdf_to_schema(gdf: gpd.GeoDataFrame, pg_schema: Dict[str, str]) -> gpd.GeoDataFrame:
+def cast_gdf_to_schema(gdf: gpd.GeoDataFrame, pg_schema: Dict[str, str], inplace: bool = False) -> gpd.GeoDataFrame:
     """
     Cast GeoDataFrame columns to match PostgreSQL schema.
     
     Args:
         gdf: GeoDataFrame to cast
         pg_schema: Dictionary mapping column names to PostgreSQL types
+        inplace: Cast the columns of `gdf` itself instead of a copy, and convert NA to None
+            with one pass per column (no frame-wide `replace` copy)
         
     Returns:
         GeoDataFrame with properly typed columns
     """
     dtype_map = get_pandas_dtype_map()
-    gdf_copy = gdf.copy()
+    gdf_copy = gdf if inplace else gdf.copy()
     
     for col, pg_type in pg_schema.items():
         # Skip if column doesn't exist in GeoDataFrame
@@ -330,12 +614,14 @@ def cast_gdf_to_schema(gdf: gpd.GeoDataFrame, pg_schema: Dict[str, str]) -> gpd.
             logger.debug(f"Skipping column '{col}' with type '{pg_type}'")
             continue
         
+        source_dtype = gdf_copy[col].dtype
         try:
             # Handle date/time types specially
             if pg_type == 'date':
                 gdf_copy[col] = pd.to_datetime(gdf_copy[col], errors='coerce').dt.date
             elif pg_type in ['time without time zone', 'time with time zone']:
-                gdf_copy[col] = pd.to_datetime(gdf_copy[col], format='%H:%M:%S', errors='coerce').dt.time
+                # HH:MM[:SS] -> seconds in one pass, datetime.time only for the driver
+                gdf_copy[col] = seconds_to_time(parse_time_of_day(gdf_copy[col]))
             elif pg_type in ['timestamp without time zone', 'timestamp with time zone']:
                 gdf_copy[col] = pd.to_datetime(gdf_copy[col], errors='coerce')
             else:
@@ -353,11 +639,21 @@ def cast_gdf_to_schema(gdf: gpd.GeoDataFrame, pg_schema: Dict[str, str]) -> gpd.
                 else:
                     gdf_copy[col] = gdf_copy[col].astype(pandas_dtype)
             
-            logger.debug(f"Converted column '{col}' from {gdf[col].dtype} to {pandas_dtype} ({pg_type})")
+            logger.debug(f"Converted column '{col}' from {source_dtype} to {pandas_dtype} ({pg_type})")
             
         except Exception as e:
             logger.warning(f"Failed to convert column '{col}' to {pandas_dtype}: {e}")
     
+    if inplace:
+        # object column with None for every NA, one conversion per column
+        geometry = gdf_copy.geometry.name
+        for col in gdf_copy.columns:
+            if col != geometry:
+                na = gdf_copy[col].isna()
+                if na.any():
+                    gdf_copy[col] = gdf_copy[col].astype(object).where(~na, None)
+        return gdf_copy
+
     # Convert pd.NA and NaN to None for PostgreSQL compatibility
     # Replace all NaN/NA values with None
     gdf_copy = gdf_copy.replace({pd.NA: None, float('nan'): None})
@@ -407,6 +703,23 @@ def validate_schema_match(gdf: gpd.GeoDataFrame, pg_schema: Dict[str, str]) -> D
     return results
 
 
+def register_imported(gdf: gpd.GeoDataFrame, index_path: Path):
+    """
+    Add the imported records to the near-duplicate index checked by `preprocess.py --dedup`.
+    The import is already committed: failures only log a warning.
+    
+    Args:
+        gdf: Imported GeoDataFrame
+        index_path: Parquet file of the index of the table
+    """
+    try:
+        index = DedupIndex.load(index_path)
+        index.add(record_keys(gdf))
+        index.save()
+    except Exception as e:
+        logger.warning(f"Could not update the dedup index {index_path}: {e}")
+
+
 def main(args):
     """
     Main function to import GPKG data into database.
@@ -422,7 +735,7 @@ def main(args):
     create_logger(file_name)
         
     # Validate input type
-    valid_types = ['ocorrencia', 'manejo']
+    valid_types = schema_tables()
     if case_type not in valid_types:
         logger.error(f"Invalid type '{case_type}'. Must be one of: {', '.join(valid_types)}")
         return 1
@@ -441,7 +754,7 @@ def main(args):
     }
     
     # Initialize importer class
-    importer = DataImporter(db_config)
+    importer = DataImporter(db_config, loader=args.loader)
     
     # Read GPKG file
     try:
@@ -473,20 +786,41 @@ def main(args):
             return 1
         else:
             logger.success("Schema Validated!")
+        
+        ## Row-level checks, before any insert
+        not_null = [col for col, nullable in zip(dict_out['cols'], dict_out['nullable'])
+                    if nullable == 'NO' and col not in ('id', 'created_at', 'updated_at')]
+        report = validate_gdf(gdf, table_name, pg_schema=schema_dict, not_null=not_null)
+        invalid = report.invalid
+        if invalid.any():
+            report.write(file_name.with_suffix('.validation.json'))
+            if args.on_invalid == 'reject':
+                logger.error(f"{int(invalid.sum())} invalid rows, nothing imported.")
+                return 1
+            quarantine_file = file_name.with_name(f"{file_name.stem}.quarantine.gpkg")
+            gdf[invalid].to_file(quarantine_file, driver="GPKG")
+            logger.warning(f"{int(invalid.sum())} invalid rows quarantined to: {quarantine_file.absolute()}")
+            gdf = gdf[~invalid].reset_index(drop=True)
+            if len(gdf) == 0:
+                logger.error("No valid rows left to import.")
+                return 1
             
         ## Cast to schema
-        new_gdf = cast_gdf_to_schema(gdf, schema_dict)
+        # gdf is not used afterwards: cast it in place
+        new_gdf = cast_gdf_to_schema(gdf, schema_dict, inplace=True)
         logger.success(f"Casting to schema complete!")
         
         # Now do the actual import
         logger.info(f"Processing {case_type} data from: {file_name.absolute()}")
         
-        # Import based on type
-        if case_type == 'ocorrencia':
-            importer.import_ocorrencia(new_gdf)
-        elif case_type == 'manejo':
-            importer.import_manejo(new_gdf)
+        # Import with the plan of the table, built from the columns fetched above
+        importer.get_import_plan(table_name, dict_out)
+        if args.mode == 'upsert':
+            importer.upsert_table(table_name, new_gdf)
+        else:
+            importer.import_table(table_name, new_gdf)
         
+        register_imported(new_gdf, Path(args.dedup_dir) / f"{table_name}.parquet")
         logger.success(f"Import completed successfully for {case_type}")
         return 0
         
@@ -514,13 +848,37 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         '--type',
-        choices=['ocorrencia', 'manejo'],
-        help='Table to be imported.'
+        choices=schema_tables(),
+        help='Table to be imported (tables of config/schema.json).'
     )
     parser.add_argument(
         '--file_name',
         help='Path to the GPKG file to import'
     )
+    parser.add_argument(
+        '--loader',
+        choices=['insert', 'copy'],
+        default='insert',
+        help='insert: batched INSERT statements; copy: bulk load with COPY ... FROM STDIN'
+    )
+    parser.add_argument(
+        '--mode',
+        choices=['append', 'upsert'],
+        default='append',
+        help='append: insert every record; upsert: stage with COPY and write only new or changed records '
+             '(natural key date, time, especie, geom), so re-imports do not duplicate rows'
+    )
+    parser.add_argument(
+        '--on-invalid',
+        choices=['reject', 'quarantine'],
+        default='reject',
+        help='Rows failing validation: reject the whole file, or quarantine them to <file>.quarantine.gpkg and import the rest'
+    )
+    parser.add_argument(
+        '--dedup-dir',
+        default='./output/cache/dedup',
+        help='Folder of the index of imported records used by preprocess.py --dedup'
+    )
     
     args = parser.parse_args()
     
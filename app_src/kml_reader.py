@@ -4,6 +4,8 @@ from lxml import etree
 from shapely.geometry import Point
 import geopandas as gpd 
 
+from src.func import read_placemark
+
 def parse_kml(kml_path)-> None:
     """
     Process kml file into a geodataframe.
@@ -26,28 +28,19 @@ def parse_kml(kml_path)-> None:
     # Extract placemarks with schema1 data
     try:
         data = []
-        for placemark in root.findall('.//kml:Placemark', ns):
-            schema_data = placemark.find('.//kml:SchemaData[@schemaUrl="#schema1"]', ns)
-            if schema_data is not None:
+        for placemark in root.iterfind('.//kml:Placemark', ns):
+            # One walk over the Placemark instead of a search per element
+            name, timestamp, coords_text, schema_url, simple_data = read_placemark(placemark, schema_url="#schema1")
+            if schema_url == "#schema1":
                 # Get coordinates
-                coords_text = placemark.find('.//kml:coordinates', ns).text.strip()
-                lon, lat, alt = map(float, coords_text.split(','))
-                
-                # Get name
-                name = placemark.find('.//kml:name', ns).text
-                
-                # Get timestamp if available
-                timestamp_elem = placemark.find('.//kml:when', ns)
-                timestamp = timestamp_elem.text if timestamp_elem is not None else None
+                lon, lat, alt = map(float, coords_text.strip().split(','))
                 
                 # Extract all SimpleData fields
                 record = {'name': name,
                         'geometry': Point(lon, lat),
                         'elevation':alt,
                         "date_og":timestamp}
-                for simple_data in schema_data.findall('.//kml:SimpleData', ns):
-                    field_name = simple_data.get('name')
-                    field_value = simple_data.text
+                for field_name, field_value in simple_data:
                     record[field_name] = field_value
                 
                 data.append(record)
@@ -1,6 +1,7 @@
 import geopandas as gpd    
 import fiona
 import pandas as pd
+import numpy as np
 from datetime import datetime
 from loguru import logger
 import sys
@@ -8,11 +9,46 @@ import os
 import argparse
 from pathlib import Path
 import json
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
 
 from pathlib import Path
 from lxml import etree
 from shapely.geometry import Point
 
+import pyarrow as pa
+import pyogrio
+
+from src.func import iter_parse_kml
+from src.dedup import DedupIndex
+from src.kml_cache import KmlCache
+from src.profiling import StageProfiler, maybe_stage
+from src.timeofday import duration_seconds, format_time_of_day, parse_time_of_day, seconds_to_arrow_time
+
+# Avenza writes every timestamp as `2025-11-27T11:28:08-03:00`
+AVENZA_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+AVENZA_TZ = "America/Sao_Paulo"
+# Trailing UTC offset of an ISO8601 timestamp (`Z`, `-03:00`, `+0100`)
+UTC_OFFSET_PATTERN = r"(?:Z|[+-]\d{2}:?\d{2})$"
+# Picklist answers look like `2 - Moderado`: keep what comes before the first "-"
+CODE_PATTERN = r"^\s*([^-]*?)\s*(?:-|$)"
+
+# Columns built by Preprocessor.create_new_cols and the source columns they are derived from
+DERIVED_COLS = {
+    "date": ("date_og",),
+    "time": ("date_og",),
+    # manejo: duration of the action in seconds
+    "duracao": ("inicio acao hh:mm:ss", "fim acao hh:mm:ss"),
+}
+# Type of the values of the derived columns (the schema declares date/time as "datetime")
+DERIVED_TYPES = {"date": "date", "time": "time", "duracao": "int"}
+
+# Picklist columns split by apply_cleaning, per table
+CLEANING_COLS = {
+    "manejo": ('risco da invasao','estagio invasao','grau dispersao','zona'),
+    "ocorrencia": ('zone','risco da invasao','estagio invasao','grau dispersao'),
+}
 
 def create_logger():
     # Configure loguru logging to pipe output to sys.stdout
@@ -20,12 +56,423 @@ def create_logger():
     logger.add(
         sys.stdout
     )
+
+def parse_avenza_datetime(values:pd.Series, tz:str = AVENZA_TZ) -> pd.Series:
+    """
+    Parse the Avenza timestamps into a single tz-aware datetime64 column.
+    Strings are parsed with the fixed Avenza format in one vectorized call and
+    converted to `tz`, so devices exporting with another offset end up on the
+    same local clock. Values outside the format fall back to ISO8601 parsing.
+    Naive values (strings or datetimes) are already on the local clock: they are
+    localized to `tz` unchanged, only offset-aware values are converted.
+
+    Args:
+        values: pd.Series
+            Timestamps as strings or datetimes.
+        tz: str
+            Target timezone (default America/Sao_Paulo).
+
+    Returns:
+        pd.Series of dtype datetime64[.., tz]. Unparseable values are NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        if values.dt.tz is None:
+            return localize_wall_clock(values, tz)
+        return values.dt.tz_convert(tz)
+
+    parsed = pd.to_datetime(values, format=AVENZA_TIME_FORMAT, errors="coerce", utc=True).dt.tz_convert(tz)
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        has_offset = retry & values.astype("str").str.contains(UTC_OFFSET_PATTERN, regex=True).fillna(False)
+        naive = retry & ~has_offset
+        if has_offset.any():
+            parsed[has_offset] = pd.to_datetime(values[has_offset], format="ISO8601", errors="coerce",
+                                                utc=True).dt.tz_convert(tz)
+        if naive.any():
+            parsed[naive] = localize_wall_clock(pd.to_datetime(values[naive], format="ISO8601", errors="coerce"), tz)
+    return parsed
+
+
+def localize_wall_clock(values:pd.Series, tz:str) -> pd.Series:
+    """
+    Localize naive datetimes to `tz` keeping their wall clock. Times skipped by a
+    DST start move forward, times repeated by a DST end take the standard-time offset.
+    """
+    return values.dt.tz_localize(tz, ambiguous=np.zeros(len(values), dtype=bool), nonexistent="shift_forward")
+
+
+def clean_codes(values:pd.Series, dtype:str = None) -> pd.Series:
+    """
+    Vectorized version of the picklist cleaning: `2 - Moderado` -> `2`.
+    Picklist columns hold a handful of distinct answers, so the values are
+    factorized first and the string kernel runs on the uniques only, the
+    result is spread back with a single take. NA stays NA.
+
+    Args:
+        values: pd.Series
+            Column to be cleaned (text, categorical or already numeric).
+        dtype: str
+            Schema type of the column. "int" returns nullable Int64 codes directly.
+
+    Returns:
+        pd.Series with the same index as `values`.
+    """
+    if pd.api.types.is_numeric_dtype(values) and not isinstance(values.dtype, pd.CategoricalDtype):
+        # Nothing to split, e.g. a gpkg column that was already stored as a number
+        return values.astype("Int64") if dtype == "int" else values
+
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+
+    cleaned = pd.Series(uniques).astype("string").str.extract(CODE_PATTERN, expand=False)
+    if dtype == "int":
+        cleaned = pd.to_numeric(cleaned, errors="coerce").astype("Int64")
+
+    return pd.Series(pd.api.extensions.take(cleaned.array, codes, allow_fill=True),
+                     index=values.index, name=values.name)
+
+
+def to_export_gdf(gdf:gpd.GeoDataFrame, time_cols:tuple = ()) -> gpd.GeoDataFrame:
+    """
+    Format the datetime64 derived columns only at the file boundary:
+    `date` is written as YYYY-MM-DD and time-of-day (timedelta, or seconds since midnight
+    for `time_cols`) columns as HH:MM:SS, the text layout read back by `db_importer.py`.
+    """
+    gdf = gdf.copy(deep=False)
+    for col in time_cols:
+        if col in gdf.columns and pd.api.types.is_integer_dtype(gdf[col]):
+            gdf[col] = format_time_of_day(gdf[col])
+    if "date" in gdf.columns and pd.api.types.is_datetime64_any_dtype(gdf["date"]):
+        gdf["date"] = gdf["date"].dt.strftime("%Y-%m-%d")
+    for col in gdf.columns:
+        if pd.api.types.is_timedelta64_dtype(gdf[col]):
+            gdf[col] = (pd.Timestamp(0) + gdf[col]).dt.strftime("%H:%M:%S")
+    return gdf
+
+
+def cast_int(values:pd.Series) -> pd.Series:
+    # Columns parsed with `typed=True` (or cleaned as codes) are already Int64
+    if values.dtype == "Int64":
+        return values
+    return pd.to_numeric(values, errors="coerce").astype("Int64")
+
+
+def cast_float(values:pd.Series) -> pd.Series:
+    if pd.api.types.is_float_dtype(values):
+        return values
+    return pd.to_numeric(values, errors="coerce")
+
+
+def cast_bool(values:pd.Series) -> pd.Series:
+    return values.apply(lambda x: bool(x))
+
+
+# `data_type_source` of schema.json -> cast function. "str" and "geometry" are kept as read.
+CASTS = {
+    "datetime": parse_avenza_datetime,
+    "int": cast_int,
+    "float": cast_float,
+    # seconds since midnight (Int32), formatted as HH:MM:SS only when written
+    "time": parse_time_of_day,
+    "bool": cast_bool,
+}
+
+# `data_type_source` -> pandas dtype of the column as written in the default (numpy) mode,
+# other types are written as text
+NUMPY_TYPES = {
+    "int": "Int64",
+    "float": "float64",
+    "bool": "boolean",
+}
+
+# `data_type_source` -> Arrow type of the column in `--arrow` mode
+ARROW_TYPES = {
+    "str": pa.string(),
+    "int": pa.int32(),
+    "float": pa.float64(),
+    "bool": pa.bool_(),
+    "time": pa.time32("s"),
+    "date": pa.date32(),
+}
+
+
+def to_arrow_column(values:pd.Series, dtype:str) -> pd.Series:
+    """
+    Convert an already cleaned/cast column to its `pd.ArrowDtype` counterpart.
+    Timestamps keep their timezone, "str" (or untyped cleaned) columns become Arrow strings.
+    """
+    if dtype == "geometry" or isinstance(values.dtype, pd.ArrowDtype):
+        return values
+    if dtype == "datetime":
+        if not pd.api.types.is_datetime64_any_dtype(values):
+            return values
+        return values.astype(pd.ArrowDtype(pa.timestamp("us", tz=values.dt.tz)))
+    if dtype == "time":
+        return seconds_to_arrow_time(values)
+    arrow_type = ARROW_TYPES.get(dtype, pa.string())
+    if pa.types.is_string(arrow_type) and not pd.api.types.is_string_dtype(values):
+        # mixed objects: format them as text first, NA stays NA
+        values = values.astype("string")
+    return values.astype(pd.ArrowDtype(arrow_type))
+
+
+def split_date_time(date_og:pd.Series) -> tuple:
+    """
+    Local date and time of day of the tz-aware `date_og`, without per-row Python objects.
+    datetime64 input gives (datetime64 midnight, timedelta64 since midnight),
+    Arrow timestamps give (date32, time32) through the pyarrow kernels.
+    """
+    if isinstance(date_og.dtype, pd.ArrowDtype):
+        return date_og.dt.date, date_og.dt.time.astype(pd.ArrowDtype(pa.time32("s")))
+    # Work on the wall clock: a tz-aware midnight does not exist on DST-start days
+    # and DST-end days are 25h long, so `date_og - midnight` would be an hour off
+    local = date_og.dt.tz_localize(None)
+    midnight = local.dt.normalize()
+    return midnight, local - midnight
+
+
+@dataclass(frozen=True)
+class SchemaPlan():
+    """
+    Compiled, read-only version of a table of `schema.json`.
+    Everything `Preprocessor` needs is resolved once here: the cast function and
+    cleaning flag of each source column, the rename map and the final DB columns.
+
+    Attributes:
+        table: str
+            Table name ("" when built from loose dicts).
+        steps: tuple
+            (source column, data_type_source, clean?, cast function or None) per column.
+        rename: Mapping
+            Source column -> DB column, for the columns that reach the DB.
+        keep: tuple
+            Final DB columns (the active geometry column is always kept).
+        drop: tuple
+            Source columns mapped to "None".
+        columns: tuple
+            Source columns the pipeline reads: the ones reaching the DB plus the ones
+            new columns are derived from. Everything else is never loaded, cleaned or cast.
+        arrow: bool
+            Columns leave the plan as `pd.ArrowDtype` (string, int32, timestamp, time32).
+    """
+    table: str
+    steps: tuple
+    rename: MappingProxyType
+    keep: tuple
+    drop: tuple
+    columns: tuple
+    arrow: bool = False
+
+    @property
+    def types(self) -> dict:
+        return {col: dtype for col, dtype, _, _ in self.steps if dtype is not None}
+
+    @property
+    def time_columns(self) -> tuple:
+        """DB names of the time-of-day columns (seconds since midnight until written)."""
+        return tuple(self.rename.get(col, col) for col, dtype, _, _ in self.steps if dtype == "time")
+
+    @property
+    def db_types(self) -> dict:
+        """DB column -> type of the values written to it (`data_type_source`, or DERIVED_TYPES)."""
+        types = {self.rename.get(col, col): dtype for col, dtype, _, _ in self.steps
+                 if dtype not in (None, "geometry")}
+        types.update(DERIVED_TYPES)
+        return {col: dtype for col, dtype in types.items() if col in self.keep}
+
+    def empty_column(self, col:str, index:pd.Index) -> pd.Series:
+        """
+        All-NA column for a DB column the input does not have. In Arrow mode it gets the Arrow
+        type the plan gives the column, so every batch of a chunked run writes the same field types.
+        """
+        if self.arrow:
+            arrow_type = ARROW_TYPES.get(self.db_types.get(col), pa.string())
+            return pd.Series(pd.NA, index=index, dtype=pd.ArrowDtype(arrow_type))
+        return pd.Series(None, index=index, dtype=object)
+
+    def conform(self, gdf:gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        """
+        Put a processed frame in the layout of the plan: DB columns in `keep` order (other
+        columns, e.g. `duplicado`, after them) cast to the dtype the plan gives them. The batches
+        of a chunked run then write the same fields, in the same order, with the same types,
+        whatever values (or missing columns) each batch has.
+        """
+        order = [col for col in self.keep if col in gdf.columns]
+        order += [col for col in gdf.columns if col not in order]
+        out = {}
+        for col, dtype in self.db_types.items():
+            if col not in gdf.columns or dtype == "datetime":
+                continue
+            target = (pd.ArrowDtype(ARROW_TYPES.get(dtype, pa.string())) if self.arrow
+                      else NUMPY_TYPES.get(dtype, "str"))
+            values = gdf[col]
+            if values.dtype == target:
+                continue
+            if dtype in ("int", "float") and not pd.api.types.is_numeric_dtype(values):
+                # e.g. an input column that already has the DB name and skipped the cast steps
+                values = CASTS[dtype](values)
+            out[col] = to_arrow_column(values, dtype) if self.arrow else values.astype(target)
+        gdf = gdf.assign(**out) if out else gdf
+        return gdf[order] if order != list(gdf.columns) else gdf
+
+    @property
+    def cleaning_cols(self) -> list:
+        return [col for col, _, clean, _ in self.steps if clean]
+
+    def project(self, gdf:gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        """Keep only the planned source columns (and the geometry) before any work is done."""
+        needed = set(self.columns)
+        keep = [col for col in gdf.columns if col in needed or col == gdf.geometry.name]
+        if len(keep) < len(gdf.columns):
+            logger.debug(f"Projection: skipping {len(gdf.columns) - len(keep)} columns that do not reach the DB")
+            return gdf[keep]
+        return gdf
+
+    def transform(self, gdf:gpd.GeoDataFrame, clean:bool = True, cast:bool = True) -> gpd.GeoDataFrame:
+        """
+        Clean and/or cast every planned column in a single pass and assign them at once.
+        Columns missing from `gdf` are reported and skipped.
+        """
+        out = {}
+        for col, dtype, to_clean, func in self.steps:
+            if not ((clean and to_clean) or (cast and (func is not None or self.arrow))):
+                continue
+            if col not in gdf.columns:
+                logger.warning(f"Column '{col}' from schema not found in GDF, skipping")
+                continue
+            try:
+                out[col] = self._convert(gdf[col], dtype, clean and to_clean, func if cast else None, cast)
+            except Exception as e:
+                logger.error(f"Error applying schema to column '{col}': {e}")
+                continue
+            logger.debug(f"Applied {'cleaning + ' if clean and to_clean else ''}{dtype} to column '{col}'")
+
+        # one assignment for all the columns, instead of one insert per column
+        return gdf.assign(**out) if out else gdf
+
+    def _convert(self, values:pd.Series, dtype:str, clean:bool, func, arrow:bool = True) -> pd.Series:
+        if clean:
+            values = clean_codes(values, dtype)
+        if func is not None:
+            values = func(values)
+        if arrow and self.arrow:
+            values = to_arrow_column(values, dtype)
+        return values
+
+    def duration(self, start:pd.Series, end:pd.Series) -> pd.Series:
+        """`end - start` of two time-of-day columns, in seconds (int32 column in Arrow mode)."""
+        duration = duration_seconds(start, end)
+        return to_arrow_column(duration, "int") if self.arrow else duration
+
+    def select(self, gdf:gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        """
+        Rename to the DB names and keep the DB columns only (one column selection).
+        DB columns absent from `gdf` are created empty.
+        """
+        # CRITICAL: Always preserve the geometry column (under its DB name when mapped)
+        geometry = self.rename.get(gdf.geometry.name, gdf.geometry.name)
+        gdf = gdf.rename(columns={src: db for src, db in self.rename.items() if src in gdf.columns})
+        keep = set(self.keep).union({geometry})
+        present = [col for col in gdf.columns if col in keep]
+        missing = [col for col in self.keep if col not in gdf.columns]
+        dropped = [col for col in gdf.columns if col not in keep]
+
+        if missing:
+            logger.warning(f"Creating missing DB columns: {missing}")
+        if dropped:
+            logger.warning(f"Dropping {len(dropped)} extra columns: {dropped}")
+
+        out = gdf[present].set_geometry(geometry)
+        if not missing:
+            return out
+        if self.arrow:
+            return out.assign(**{col: self.empty_column(col, out.index) for col in missing})
+        return out.assign(**{col: None for col in missing})
+
+
+def build_plan(schema:dict, cleaning_cols:list, map_gdf_db:dict, table:str = "", arrow:bool = False) -> SchemaPlan:
+    """
+    Compile the column type dict, cleaning list and GDF -> DB mapping into a `SchemaPlan`.
+
+    Args:
+        schema: dict
+            GDF col -> data_type_source (see `coltype_unified_schema`).
+        cleaning_cols: list
+            Columns cleaned by `clean_codes`.
+        map_gdf_db: dict
+            GDF col -> DB col, "None" drops the column (see `map_gdf_db_unified_schema`).
+        table: str
+            Name of the table, informative.
+        arrow: bool
+            Build `pd.ArrowDtype` columns (see `SchemaPlan`).
+    """
+    rename = {src: db for src, db in map_gdf_db.items() if db is not None and db != "None"}
+    drop = tuple(src for src, db in map_gdf_db.items() if db is None or db == "None")
+    keep = tuple(dict.fromkeys(rename.values()))
+
+    # Projection pushdown: work out the source columns that are really needed first
+    if rename:
+        # source keys, plus input columns that already carry the DB name
+        columns = list(rename) + list(keep)
+        for col in rename:
+            columns.extend(DERIVED_COLS.get(col, ()))
+        columns = tuple(dict.fromkeys(columns))
+    else:
+        # no mapping given: nothing is dropped later, so every column is needed
+        columns = tuple(dict.fromkeys(list(schema) + list(cleaning_cols)))
+    needed = set(columns)
+
+    steps = []
+    for col, dtype in schema.items():
+        if col in needed:
+            steps.append((col, dtype, col in cleaning_cols, CASTS.get(dtype)))
+    for col in cleaning_cols:
+        if col not in schema and col in needed:
+            steps.append((col, None, True, None))
+
+    return SchemaPlan(table, tuple(steps), MappingProxyType(rename), keep, drop, columns, arrow)
+
+
+def compile_schema(schema_unif:dict, table_name:str, arrow:bool = False) -> SchemaPlan:
+    """Compile the table `table_name` of the unified schema (`config/schema.json`)."""
+    return build_plan(coltype_unified_schema(schema_unif, table_name),
+                      CLEANING_COLS.get(table_name, ()),
+                      map_gdf_db_unified_schema(schema_unif, table_name),
+                      table_name,
+                      arrow)
+
+
+@lru_cache(maxsize=16)
+def _load_schema_plan(schema_file:str, mtime_ns:int, table_name:str, arrow:bool) -> SchemaPlan:
+    with open(schema_file, "r", encoding="utf-8") as f:
+        schema_unif = json.load(f)
+    if table_name not in schema_unif:
+        raise ValueError(f"Unknown type '{table_name}'. Must be one of {list(schema_unif)}")
+    logger.debug(f"Compiled schema plan for table: {table_name}")
+    return compile_schema(schema_unif, table_name, arrow)
+
+
+def load_schema_plan(schema_file:Path, table_name:str, arrow:bool = False) -> SchemaPlan:
+    """
+    Return the compiled plan of `table_name`, compiled once per process and schema version:
+    the cache key holds the file mtime, so editing `schema.json` recompiles it.
+    """
+    schema_file = Path(schema_file)
+    if not schema_file.exists():
+        logger.error(f"Schema file not found: {schema_file}")
+        raise FileNotFoundError(f"Schema file not found: {schema_file}")
+    return _load_schema_plan(str(schema_file.resolve()), schema_file.stat().st_mtime_ns, table_name, arrow)
+
+
 class Preprocessor():
     """
     Class to preprocess KML data with schema application and text cleaning.
     """
-    def __init__(self, gdf:gpd.GeoDataFrame, schema:dict, cleaning_cols:list,
-                 map_gdf_db:dict, verbose:int = 1) -> gpd.GeoDataFrame:
+    def __init__(self, gdf:gpd.GeoDataFrame, schema:dict = None, cleaning_cols:list = None,
+                 map_gdf_db:dict = None, verbose:int = 1, plan:SchemaPlan = None,
+                 profiler:StageProfiler = None) -> gpd.GeoDataFrame:
         """
         Init Preprocessor:
         It cleans the coming GDF by casting the values following the `schemas.json`. Apply Schema Step
@@ -42,12 +489,20 @@ class Preprocessor():
             map_gdf_db: dict. 
                 Dict that contains as key the columns representing the gdf and as values the columns representing the PostgreSQL table. 
             verbose:Int (1 to print, 0 not)
+            plan: SchemaPlan
+                Compiled plan (see `load_schema_plan`). When given, schema, cleaning_cols and map_gdf_db are not needed.
+            profiler: StageProfiler
+                Opt-in: time each stage separately (cleaning and schema are then not fused).
         """
+        if plan is None:
+            plan = build_plan(schema or {}, cleaning_cols or [], map_gdf_db or {})
         self.gdf = gdf
-        self.schema = schema
-        self.cleaning_cols = cleaning_cols
-        self.map_gdf_db = map_gdf_db
+        self.plan = plan
+        self.schema = plan.types
+        self.cleaning_cols = plan.cleaning_cols
+        self.map_gdf_db = dict(plan.rename)
         self.verbose = verbose
+        self.profiler = profiler
         
         logger.info("="*50)
         logger.info("Preprocessor initialized")
@@ -58,97 +513,58 @@ class Preprocessor():
     def apply_schema(self):
         """Apply data type schema to geodataframe columns."""
         logger.info("Applying schema to geodataframe...")
-        
-        datetime_l = []
-        int_l = []
-        time_l = []
-        float_l = []
-        bool_l = []
-        
+        self.gdf = self.plan.transform(self.gdf, clean=False, cast=True)
+        self._log_schema()
+        return self.gdf
+
+    def _log_schema(self):
+        by_type = {}
         for col, dtype in self.schema.items():
-            if col not in self.gdf.columns:
-                logger.warning(f"Column '{col}' from schema not found in GDF, skipping")
-                continue
-                
-            try:
-                if dtype == "datetime":
-                    datetime_l.append(col)
-                    self.gdf[col] = pd.to_datetime(self.gdf[col], errors="coerce")
-
-                elif dtype == "int":
-                    int_l.append(col)
-                    self.gdf[col] = pd.to_numeric(self.gdf[col], errors="coerce").astype("Int64")
-
-                elif dtype == "float":
-                    float_l.append(col)
-                    self.gdf[col] = pd.to_numeric(self.gdf[col], errors="coerce")
-                
-                elif dtype == "time":
-                    time_l.append(col)
-                    self.gdf[col] = pd.to_datetime(self.gdf[col], errors="coerce").apply(lambda x: x.time())
-
-                elif dtype == "bool":
-                    bool_l.append(col)
-                    self.gdf[col] = self.gdf[col].apply(lambda x: bool(x))
-                    
-                logger.debug(f"Applied {dtype} type to column '{col}'")
-                
-            except Exception as e:
-                logger.error(f"Error applying schema to column '{col}': {e}")
-        
+            if col in self.gdf.columns:
+                by_type.setdefault(dtype, []).append(col)
         logger.info(f"Schema applied successfully:")
-        logger.info(f"  - Datetime columns: {datetime_l}")
-        logger.info(f"  - Integer columns: {int_l}")
-        logger.info(f"  - Float columns: {float_l}")
-        logger.info(f"  - Time columns: {time_l}")
-        logger.info(f"  - Boolean columns: {bool_l}")
-        
-        return self.gdf
+        logger.info(f"  - Datetime columns: {by_type.get('datetime', [])}")
+        logger.info(f"  - Integer columns: {by_type.get('int', [])}")
+        logger.info(f"  - Float columns: {by_type.get('float', [])}")
+        logger.info(f"  - Time columns: {by_type.get('time', [])}")
+        logger.info(f"  - Boolean columns: {by_type.get('bool', [])}")
 
-        
     def apply_cleaning(self):
         """
         Split the text input referenced by "-". Return the number which represents the first
-        item of the list.
+        item of the list. Columns typed as "int" in the schema return the numeric code.
         """
         logger.info("Applying text cleaning to specified columns...")
-        
-        def clean_txt(txt):
-            if pd.isna(txt):
-                return txt
-            s = str(txt).split('-')
-            if len(s) > 0:
-                return s[0].strip()
-            else:
-                return txt
-        
-        # Loop through the cleaning columns list
-        cleaned_count = 0
-        for col in self.cleaning_cols:
-            if col in self.gdf.columns:
-                self.gdf[col] = self.gdf[col].apply(lambda x: clean_txt(x))
-                cleaned_count += 1
-                logger.debug(f"Cleaned column: '{col}'")
-            else:
-                logger.warning(f"Column '{col}' not found for cleaning, skipping")
-        
+        self.gdf = self.plan.transform(self.gdf, clean=True, cast=False)
+        cleaned_count = len([col for col in self.cleaning_cols if col in self.gdf.columns])
         logger.success(f"Text cleaning completed on {cleaned_count} columns")
         return self
     
     def create_new_cols(self):
         """
         CREATE: ID, DATE, TIME 
+        Both derive from the tz-aware `date_og` without per-row Python objects:
+        `date` is the local day (datetime64) and `time` the offset since midnight (timedelta64).
+        With an Arrow plan they are date32 and time32 columns.
         """
         logger.info("Creating new date and time columns...")
         
         try:
+            date, time = split_date_time(self.gdf['date_og'])
+
             ## convert date
-            self.gdf['date'] = self.gdf['date_og'].apply(lambda x: x.date())
+            self.gdf['date'] = date
             logger.debug("Created 'date' column")
 
             ## get time
-            self.gdf['time'] = self.gdf['date_og'].apply(lambda x: x.time())
+            self.gdf['time'] = time
             logger.debug("Created 'time' column")
+
+            ## manejo: duration of the action, from the parsed inicio/fim seconds
+            start_col, end_col = DERIVED_COLS['duracao']
+            if 'duracao' in self.plan.keep and start_col in self.gdf.columns and end_col in self.gdf.columns:
+                self.gdf['duracao'] = self.plan.duration(self.gdf[start_col], self.gdf[end_col])
+                logger.debug("Created 'duracao' column")
             
             logger.success("New columns created successfully")
             
@@ -162,14 +578,26 @@ class Preprocessor():
         """Return the processed geodataframe."""
         return self.gdf
     
+    def _stage(self, name:str):
+        """Profile the block as the stage `name` when a profiler is attached."""
+        return maybe_stage(self.profiler, name, len(self.gdf))
+
     def process(self):
-        """Execute full preprocessing pipeline."""
+        """Execute full preprocessing pipeline: projection, cleaning and schema in one pass, then new columns."""
         logger.info("Starting full preprocessing pipeline...")
         
         try:
-            self.apply_cleaning()
-            self.apply_schema()
-            self.create_new_cols()
+            self.gdf = self.plan.project(self.gdf)
+            if self.profiler is None:
+                self.gdf = self.plan.transform(self.gdf, clean=True, cast=True)
+                self._log_schema()
+            else:
+                with self._stage("apply_cleaning"):
+                    self.apply_cleaning()
+                with self._stage("apply_schema"):
+                    self.apply_schema()
+            with self._stage("create_new_cols"):
+                self.create_new_cols()
             logger.success("Preprocessing pipeline completed successfully")
             return self.get_gdf()
         except Exception as e:
@@ -184,48 +612,11 @@ class Preprocessor():
         logger.info("Preparing GDF to match database table structure...")
         logger.debug(f"GDF shape before preparation: {self.gdf.shape}")
         
-        # Filter out mappings where db_column is None or "None"
-        valid_mappings = {k: v for k, v in self.map_gdf_db.items() 
-                            if v is not None and v != "None"}
-        
-        removed_cols = [k for k, v in self.map_gdf_db.items() 
-                            if v is None or v == "None"]
-        if removed_cols:
-            logger.info(f"Columns mapped to None (will be removed): {removed_cols}")
-        
-        # Rename columns based on the valid mapping only
-        rename_dict = {
-            src: db for src, db in valid_mappings.items() 
-            if src in self.gdf.columns
-        }
-        self.gdf = self.gdf.rename(columns=rename_dict)
-        logger.debug(f"Renamed columns according to mapping")
-
-        # Columns expected by the DB (values of the valid mapping dict)
-        cols_db = set(valid_mappings.values())
-
-        # 1. Ensure all DB-required columns exist
-        missing_db_cols = cols_db.difference(self.gdf.columns)
-        if missing_db_cols:
-            logger.warning(f"Creating missing DB columns: {list(missing_db_cols)}")
-            for col in missing_db_cols:
-                # Create the missing column and fill with None (or NaN)
-                self.gdf[col] = None
-
-        # CRITICAL: Always preserve the geometry column
-        cols_to_keep = cols_db.union({'geometry'})
-        
-        # Identify extra columns not present in the DB table
-        # We must drop columns that were *not* successfully renamed and are not in the DB's target set.
-        # This includes the original source columns that did not have a matching DB column.
-        cols_to_drop = self.gdf.columns.difference(cols_to_keep)
-
-        # 2. Drop columns that are not in the final DB set
-        if len(cols_to_drop) > 0:
-            logger.warning(f"Dropping {len(cols_to_drop)} extra columns: {list(cols_to_drop)}")
+        if self.plan.drop:
+            logger.info(f"Columns mapped to None (will be removed): {list(self.plan.drop)}")
 
-        # Drop unnecessary columns   
-        self.gdf = self.gdf.drop(columns=list(cols_to_drop), axis='columns')
+        with self._stage("prepare_gdf_db"):
+            self.gdf = self.plan.select(self.gdf)
         
         logger.success(f"GDF prepared for database: {self.gdf.shape}")
         logger.debug(f"Final columns: {list(self.gdf.columns)}")
@@ -256,6 +647,83 @@ def map_gdf_db_unified_schema(schema:dict, table_name:"str"):
                     )
     return dict_out 
 
+def process_gdf(gdf:gpd.GeoDataFrame, plan:SchemaPlan, profiler:StageProfiler = None) -> gpd.GeoDataFrame:
+    """Run the compiled Preprocessor steps on `gdf` and return it ready to be written."""
+    preprocessor = Preprocessor(gdf, plan=plan, verbose=1, profiler=profiler)
+    ## return the intermediary gdf processed
+    gdf_processed = preprocessor.process()
+    gdf_out = preprocessor.prepare_gdf_db()
+    # Arrow columns (date32/time32) are written natively by pyogrio
+    return gdf_out if plan.arrow else to_export_gdf(gdf_out, plan.time_columns)
+
+
+def dedup_gdf(gdf:gpd.GeoDataFrame, index:DedupIndex, mode:str) -> gpd.GeoDataFrame:
+    """
+    Near-duplicate stage: check `gdf` against the records of `index` and against itself.
+    The records kept are added to `index` in memory, so the next batch of the same file is
+    checked against this one (the index file itself is only updated by `db_importer.py`).
+
+    Args:
+        mode: str
+            'flag' adds the boolean column `duplicado`, 'drop' keeps only the first record
+            of each group of near-duplicates.
+    """
+    duplicated = index.duplicated(gdf, add=True)
+    if mode == "drop":
+        return gdf[~duplicated]
+    gdf["duplicado"] = duplicated
+    return gdf
+
+
+def iter_input_batches(file_name:Path, plan:SchemaPlan, chunk_size:int):
+    """
+    Yield the input file in gdfs of at most `chunk_size` rows.
+    Raw kml files are streamed with `iter_parse_kml`, other files are read with
+    pyogrio `skip_features`/`max_features` and only the planned columns.
+    """
+    if file_name.suffix.lower() == ".kml":
+        yield from iter_parse_kml(file_name, batch_size=chunk_size)
+        return
+
+    # -1 when the driver cannot count the features cheaply: read until a short batch
+    n_features = pyogrio.read_info(file_name)["features"]
+    start = 0
+    while n_features < 0 or start < n_features:
+        batch = gpd.read_file(file_name, columns=list(plan.columns),
+                              skip_features=start, max_features=chunk_size)
+        if len(batch) > 0:
+            yield batch
+        if len(batch) < chunk_size:
+            break
+        start += chunk_size
+
+
+def write_batch(gdf:gpd.GeoDataFrame, output_file:Path, output_format:str, index:int, overwrite,
+                plan:SchemaPlan) -> None:
+    """
+    Append one processed batch to the output, conformed to `plan` first (see `SchemaPlan.conform`):
+    GPKG appends match the fields by position and the part files must share one schema.
+    GPKG: the first batch creates the layer, the next ones are appended to it.
+    GeoParquet: `output_file` is a folder and each batch is written as a part file. A whole-file
+    run is written as a single batch, so both modes share this layout.
+    """
+    gdf = plan.conform(gdf)
+    use_arrow = plan.arrow
+    if output_format == "parquet":
+        if index == 0:
+            if output_file.is_file():
+                # single-file output of earlier versions
+                output_file.unlink()
+            output_file.mkdir(parents=True, exist_ok=True)
+            for old_part in output_file.glob("part-*.parquet"):
+                old_part.unlink()
+        gdf.to_parquet(output_file / f"part-{index:05d}.parquet")
+    elif index == 0:
+        gdf.to_file(output_file, driver="GPKG", overwrite=overwrite, use_arrow=use_arrow)
+    else:
+        gdf.to_file(output_file, driver="GPKG", mode="a", use_arrow=use_arrow)
+
+
 def main(args)->None:
         # Parse arguments
     overwrite = args.overwrite
@@ -270,23 +738,13 @@ def main(args)->None:
     logger.info("="*70)
     
     try:
-        # Load unified schema
+        # Load unified schema, compiled into the transformation plan of the table
+        # (any table of schema.json; unknown types raise ValueError)
         schema_file = Path("config/schema.json")
         logger.info(f"Loading schema from: {schema_file}")
-        
-        if not schema_file.exists():
-            logger.error(f"Schema file not found: {schema_file}")
-            raise FileNotFoundError(f"Schema file not found: {schema_file}")
-            
-        with open(schema_file, "r", encoding="utf-8") as f:
-            schema_unif = json.load(f)
+        plan = load_schema_plan(schema_file, case_type, arrow=args.arrow)
         logger.success("Schema loaded successfully")
 
-        # Cleaning lists
-        list_manejo = ['risco da invasao','estagio invasao','grau dispersao','zona']
-        list_ocorrencia = ['zone','risco da invasao','estagio invasao','grau dispersao']
-        
-
         # Setup output paths
         folder_path = Path(args.path_folder_name)
         folder_name = args.folder_name
@@ -296,53 +754,66 @@ def main(args)->None:
         output_file.parent.mkdir(parents=True, exist_ok=True)
         logger.info(f"Output directory created/verified: {output_file.parent}")
         
-        gdf = gpd.read_file(file_name)
-        logger.info(f"Input file '{file_name}' loaded successfully with {len(gdf)} records")
-        
         # Process based on type
         logger.info(f"Processing data as type: {case_type.upper()}")
-        
-        match case_type:
-            case "ocorrencia":
-                table_name = "ocorrencia"
-                preprocessor = Preprocessor(
-                    gdf,
-                    coltype_unified_schema(schema_unif, table_name),
-                    list_ocorrencia,
-                    map_gdf_db_unified_schema(schema_unif, table_name),
-                    verbose=1
-                )
-                ## return the intermediary gdf processed
-                gdf_processed = preprocessor.process()
-
-                gdf_out = preprocessor.prepare_gdf_db()
-                
-            case "manejo":
-                table_name = 'manejo'
-                preprocessor = Preprocessor(
-                    gdf,
-                    coltype_unified_schema(schema_unif, table_name),
-                    list_manejo,
-                    map_gdf_db_unified_schema(schema_unif, table_name),
-                    verbose=1
-                )
-                
-                gdf_processed = preprocessor.process()
-                gdf_out = preprocessor.prepare_gdf_db()
-                
-            case _:
-                logger.error(f"Unknown type '{case_type}'. Must be 'ocorrencia' or 'manejo'")
-                raise ValueError(f"Unknown type '{case_type}'. Must be 'ocorrencia' or 'manejo'")
-        
-        # Save processed data
-        output_file = output_dir / f"{file_name.stem}.gpkg"
-        logger.info(f"Saving processed data to: {output_file}")
-        
-        gdf_out.to_file(output_file, driver="GPKG", overwrite=overwrite)
+        output_format = args.format
+        output_file = output_dir / f"{file_name.stem}.{output_format}"
+        # Opt-in per stage timing, saved next to the output file
+        profiler = None
+        if args.profile:
+            profiler = StageProfiler(file=str(file_name), type=case_type, output=str(output_file),
+                                     chunk_size=args.chunk_size, arrow=plan.arrow)
+
+        # Near-duplicates of the records already imported (index kept by db_importer.py) or of this file
+        dedup_index = None
+        if args.dedup != "off":
+            dedup_index = DedupIndex.load(Path(args.dedup_dir) / f"{case_type}.parquet",
+                                          args.dedup_distance, args.dedup_seconds)
+
+        if args.chunk_size > 0:
+            # Bounded memory: read, process and append one batch of rows at a time
+            logger.info(f"Chunked mode: {args.chunk_size} rows per batch, saving to: {output_file}")
+            n_rows, n_batches = 0, 0
+            for batch in iter_input_batches(file_name, plan, args.chunk_size):
+                gdf_out = process_gdf(batch, plan, profiler)
+                if dedup_index is not None:
+                    with maybe_stage(profiler, "dedup", len(gdf_out)):
+                        gdf_out = dedup_gdf(gdf_out, dedup_index, args.dedup)
+                with maybe_stage(profiler, "write", len(gdf_out)):
+                    write_batch(gdf_out, output_file, output_format, n_batches, overwrite, plan)
+                n_rows += len(gdf_out)
+                n_batches += 1
+                logger.info(f"Batch {n_batches} written ({n_rows} records so far)")
+            if n_batches == 0:
+                raise ValueError(f"No records found in '{file_name}'")
+        else:
+            if file_name.suffix.lower() == ".kml":
+                # Raw Avenza export: parse it once, later runs reuse the cached result
+                gdf = KmlCache(Path(args.cache_dir)).parse(file_name)
+            else:
+                # Only the columns that reach the DB (or feed a derived one) are read
+                gdf = gpd.read_file(file_name, columns=list(plan.columns))
+            logger.info(f"Input file '{file_name}' loaded successfully with {len(gdf)} records")
+
+            gdf_out = process_gdf(gdf, plan, profiler)
+            if dedup_index is not None:
+                with maybe_stage(profiler, "dedup", len(gdf_out)):
+                    gdf_out = dedup_gdf(gdf_out, dedup_index, args.dedup)
+            n_rows = len(gdf_out)
+
+            # Save processed data
+            logger.info(f"Saving processed data to: {output_file}")
+            with maybe_stage(profiler, "write", n_rows):
+                # one batch: the same file layout as the chunked mode
+                write_batch(gdf_out, output_file, output_format, 0, overwrite, plan)
+
+        if profiler is not None:
+            profiler.metadata["rows"] = n_rows
+            profiler.write(output_dir / f"{file_name.stem}.profile.json")
         
         logger.success("="*70)
         logger.success(f"FILE SAVED SUCCESSFULLY: {output_file}")
-        logger.success(f"Total records processed: {len(gdf_out)}")
+        logger.success(f"Total records processed: {n_rows}")
         logger.success(f"Total columns: {len(gdf_out.columns)}")
         logger.success("="*70)
         
@@ -360,13 +831,13 @@ if __name__ =='__main__':
         "--type", 
         type=str, 
         required=True, 
-        help="Ocorrencia ou Manejo"
+        help="Tabela do config/schema.json (ocorrencia, manejo, ...)"
     )
     parser.add_argument(
         "--file", 
         type=str, 
         required=True,
-        help="Path of the gpkg file to be processed"
+        help="Path of the gpkg (or raw Avenza kml) file to be processed"
     )
     parser.add_argument(
         "--output-file-name",
@@ -393,6 +864,61 @@ if __name__ =='__main__':
         default=False,
         help="To overwrite the file or note. Default False"
     )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default="./output/cache/kml",
+        help="Pasta do cache de KML ja lidos, usado quando --file e um .kml (default: ./output/cache/kml)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=0,
+        help="Processa o arquivo em lotes deste numero de linhas, anexando cada lote na saida (default: 0, arquivo inteiro)"
+    )
+    parser.add_argument(
+        "--format",
+        type=str,
+        choices=["gpkg", "parquet"],
+        default="gpkg",
+        help="Formato de saida: gpkg ou parquet (GeoParquet). parquet gera uma pasta com um arquivo por lote (um so sem --chunk-size)"
+    )
+    parser.add_argument(
+        "--arrow",
+        action="store_true",
+        help="Usa colunas pd.ArrowDtype (string, int32, date32, time32) e grava pela interface Arrow do pyogrio"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Mede tempo (wall/CPU), pico de RSS e linhas/s de cada etapa e salva <arquivo>.profile.json junto da saida"
+    )
+    parser.add_argument(
+        "--dedup",
+        type=str,
+        choices=["off", "flag", "drop"],
+        default="off",
+        help="Quase-duplicatas (mesma especie, perto no espaco e no tempo) do proprio arquivo ou ja importadas: "
+             "flag adiciona a coluna 'duplicado', drop remove (default: off)"
+    )
+    parser.add_argument(
+        "--dedup-dir",
+        type=str,
+        default="./output/cache/dedup",
+        help="Pasta do indice de registros ja importados, atualizado pelo db_importer.py (default: ./output/cache/dedup)"
+    )
+    parser.add_argument(
+        "--dedup-distance",
+        type=float,
+        default=5.0,
+        help="Tolerancia de distancia em metros para --dedup (default: 5)"
+    )
+    parser.add_argument(
+        "--dedup-seconds",
+        type=int,
+        default=60,
+        help="Tolerancia de tempo em segundos para --dedup (default: 60)"
+    )
     args = parser.parse_args()
     
     
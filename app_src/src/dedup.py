@@ -0,0 +1,215 @@
+import os
+from itertools import product
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+
+from src.timeofday import parse_time_of_day
+
+# SIRGAS 2000 / UTM 22S: metric coordinates around the Carijós station
+METRIC_CRS = "EPSG:31982"
+INDEX_COLUMNS = ("x", "y", "t", "especie")
+
+
+def record_keys(gdf: gpd.GeoDataFrame) -> pd.DataFrame:
+    """
+    Metric position, timestamp and species of each record, the fields compared by `DedupIndex`.
+
+    Args:
+        gdf: gpd.GeoDataFrame
+            Records with `date`, `time`, `especie` and point geometries, as written by
+            `preprocess.py` (text, datetime or Arrow date/time columns) or as cast by `db_importer.py`.
+
+    Returns:
+        pd.DataFrame with `x`, `y` (meters, METRIC_CRS), `t` (local seconds since epoch, Int64)
+        and `especie` (text, "" when missing). Records without geometry, date or time get NA.
+    """
+    points = gdf.geometry.to_crs(METRIC_CRS) if gdf.crs is not None else gdf.geometry
+    x, y = points.x.to_numpy(), points.y.to_numpy()
+
+    dates = gdf["date"]
+    if isinstance(dates.dtype, pd.ArrowDtype):
+        dates = dates.astype("datetime64[s]")
+    days = pd.to_datetime(dates, errors="coerce").dt.normalize()
+    day_s = (days - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+    t = (day_s.astype("Int64") + parse_time_of_day(gdf["time"]).astype("Int64"))
+
+    especie = gdf["especie"].astype("string").fillna("").astype(object) if "especie" in gdf \
+        else np.full(len(gdf), "", dtype=object)
+    return pd.DataFrame({"x": x, "y": y, "t": t.to_numpy(), "especie": especie}, index=gdf.index)
+
+
+class DedupIndex():
+    """
+    Spatial-temporal hash index of placemarks, to find near-duplicates in O(n) expected time.
+    Two records are near-duplicates when they have the same especie and are at most `distance`
+    meters and `seconds` seconds apart. Records are hashed into buckets of
+    (x, y) // (distance / sqrt(2)), t // seconds and especie: records sharing a bucket are
+    always near-duplicates, and the other candidates of a record are in the 75 neighbouring
+    buckets, so only the first record of each bucket is compared one by one.
+    The index can be saved to a Parquet file, so new batches are checked against the
+    records already imported without querying the database.
+    """
+    # bucket offsets that can hold a record within the tolerances
+    OFFSETS = tuple(product(range(-2, 3), range(-2, 3), (-1, 0, 1)))
+
+    def __init__(self, distance: float = 5.0, seconds: int = 60, path=None):
+        """
+        Args:
+            distance: float
+                Distance tolerance in meters. Default 5.
+            seconds: int
+                Time tolerance in seconds. Default 60.
+            path: Path
+                Parquet file of the persisted index (see `load` and `save`).
+        """
+        if distance <= 0 or seconds <= 0:
+            raise ValueError("distance and seconds tolerances must be positive")
+        self.distance = float(distance)
+        self.seconds = int(seconds)
+        self.path = Path(path) if path is not None else None
+        self.points = pd.DataFrame({"x": pd.Series(dtype=float), "y": pd.Series(dtype=float),
+                                    "t": pd.Series(dtype="int64"), "especie": pd.Series(dtype=object)})
+        self._table = None
+
+    def __len__(self):
+        return len(self.points)
+
+    @classmethod
+    def load(cls, path, distance: float = 5.0, seconds: int = 60) -> "DedupIndex":
+        """Index persisted in `path`, or an empty one bound to `path` when the file does not exist."""
+        index = cls(distance, seconds, path)
+        if index.path.exists():
+            try:
+                index.points = pq.read_table(index.path, columns=list(INDEX_COLUMNS)).to_pandas()
+                index.points["especie"] = index.points["especie"].astype(object)
+                logger.info(f"Dedup index loaded from {index.path} ({len(index)} records)")
+            except Exception as e:
+                logger.warning(f"Discarding unreadable dedup index {index.path}: {e}")
+        return index
+
+    def save(self, path=None) -> Path:
+        """Write the indexed records to `path` (default: the path of `load`), atomically."""
+        path = Path(path) if path is not None else self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        # only the records are stored, the buckets are rebuilt for the tolerances in use
+        pq.write_table(pa.Table.from_pandas(self.points, preserve_index=False), tmp)
+        os.replace(tmp, path)
+        logger.info(f"Dedup index saved to {path} ({len(self)} records)")
+        return path
+
+    def add(self, keys: pd.DataFrame):
+        """Index the rows of `keys` (see `record_keys`) that have a position and a timestamp."""
+        keys = keys.loc[keys[["x", "y", "t"]].notna().all(axis=1), list(INDEX_COLUMNS)]
+        if len(keys) == 0:
+            return
+        keys = keys.astype({"x": float, "y": float, "t": "int64", "especie": object})
+        self.points = pd.concat([self.points, keys], ignore_index=True) if len(self) else keys.reset_index(drop=True)
+        self._table = None
+
+    def _cells(self, keys: pd.DataFrame):
+        """Integer bucket coordinates of `keys` and the hash of their especie."""
+        size = self.distance / np.sqrt(2)
+        cx = np.floor(keys["x"].to_numpy(dtype=float) / size).astype(np.int64)
+        cy = np.floor(keys["y"].to_numpy(dtype=float) / size).astype(np.int64)
+        ct = np.floor_divide(keys["t"].to_numpy(dtype=np.int64), self.seconds)
+        especie = pd.util.hash_array(keys["especie"].to_numpy(dtype=object))
+        return cx, cy, ct, especie
+
+    @staticmethod
+    def _hash(cx, cy, ct, especie) -> np.ndarray:
+        """One uint64 hash per bucket (collisions are filtered by the exact comparison)."""
+        h = especie.copy()
+        for values in (cx, cy, ct):
+            # wrapping multiply-xor mix of each coordinate
+            h ^= values.view(np.uint64) + np.uint64(0x9E3779B97F4A7C15) + (h << np.uint64(6)) + (h >> np.uint64(2))
+            h *= np.uint64(0xBF58476D1CE4E5B9)
+        return h
+
+    def _build(self):
+        """
+        Hash table of the indexed records: unique bucket hashes (pd.Index, hashed lookup),
+        for each bucket the slice of its records in `order`, and the especie hash of the records.
+        """
+        if self._table is None:
+            cx, cy, ct, especie = self._cells(self.points)
+            hashes = self._hash(cx, cy, ct, especie)
+            order = np.argsort(hashes, kind="stable")
+            uniques, starts, counts = np.unique(hashes[order], return_index=True, return_counts=True)
+            self._table = (pd.Index(uniques), starts, counts, order, especie)
+        return self._table
+
+    def _candidates(self, keys: pd.DataFrame):
+        """
+        Pairs (row of `keys`, indexed position) of records in neighbouring buckets, found
+        with one hashed lookup per bucket offset, and whether they are within the tolerances.
+        """
+        buckets, starts, counts, order, points_especie = self._build()
+        cx, cy, ct, especie = self._cells(keys)
+        queries, matches = [], []
+        for dx, dy, dt in self.OFFSETS:
+            pos = buckets.get_indexer(self._hash(cx + dx, cy + dy, ct + dt, especie))
+            hit = np.flatnonzero(pos >= 0)
+            n = counts[pos[hit]]
+            # expand each hit into the records of its bucket
+            offset = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+            queries.append(np.repeat(hit, n))
+            matches.append(order[np.repeat(starts[pos[hit]], n) + offset])
+        query, match = np.concatenate(queries), np.concatenate(matches)
+
+        # exact tolerance test of the candidates
+        dx = keys["x"].to_numpy(dtype=float)[query] - self.points["x"].to_numpy(dtype=float)[match]
+        dy = keys["y"].to_numpy(dtype=float)[query] - self.points["y"].to_numpy(dtype=float)[match]
+        dt = keys["t"].to_numpy(dtype=np.int64)[query] - self.points["t"].to_numpy(dtype=np.int64)[match]
+        close = ((especie[query] == points_especie[match]) & (np.hypot(dx, dy) <= self.distance)
+                 & (np.abs(dt) <= self.seconds))
+        return query, match, close
+
+    def duplicated(self, gdf: gpd.GeoDataFrame, add: bool = False) -> np.ndarray:
+        """
+        Boolean mask of the near-duplicate records of `gdf`: records close to one already
+        indexed, or to an earlier record of `gdf` itself (the first of each group is kept).
+        Records without position, date or time are never duplicates.
+
+        Args:
+            gdf: gpd.GeoDataFrame
+                Records to check.
+            add: bool
+                Also index the records that are not duplicates (e.g. to check the next
+                batch of the same file against this one).
+        """
+        keys = record_keys(gdf).reset_index(drop=True)
+        valid = np.flatnonzero(keys[["x", "y", "t"]].notna().all(axis=1).to_numpy())
+        seen = np.zeros(len(keys), dtype=bool)
+        if len(valid):
+            keys_valid = keys.iloc[valid]
+            # records after the first of their bucket are duplicates of it
+            repeated = pd.DataFrame(dict(zip(("cx", "cy", "ct", "especie"), self._cells(keys_valid)))).duplicated()
+            repeated = repeated.to_numpy()
+            seen[valid[repeated]] = True
+            first = np.flatnonzero(~repeated)
+            firsts = keys_valid.iloc[first]
+
+            # first of a bucket close to an earlier record of the batch
+            batch = DedupIndex(self.distance, self.seconds)
+            batch.add(keys_valid)
+            query, match, close = batch._candidates(firsts)
+            close &= match < first[query]
+            seen[valid[first[query[close]]]] = True
+
+            # ... or to an indexed record
+            if len(self):
+                query, _, close = self._candidates(firsts)
+                seen[valid[first[query[close]]]] = True
+
+        if add:
+            self.add(keys[~seen])
+        logger.info(f"Dedup: {int(seen.sum())} of {len(gdf)} records are near-duplicates "
+                    f"({self.distance} m, {self.seconds} s)")
+        return seen
@@ -5,9 +5,18 @@ from shapely.geometry import Point
 import geopandas as gpd 
 from pathlib import Path
 import os 
+import zipfile
+from contextlib import contextmanager
+from functools import lru_cache
+import numpy as np
 import pandas as pd
+import shapely
+from loguru import logger
 
-def parse_kml(kml_path)-> None:
+# Bump when the output of the KML parsers changes, it invalidates the parse cache (src/kml_cache.py)
+PARSER_VERSION = "2"
+
+def parse_kml(kml_path, stream: bool = False, batch_size: int = 5000)-> None:
     """
     Process kml file into a geodataframe.
     Appends all metadata inside the Placemark schema1. 
@@ -17,9 +26,20 @@ def parse_kml(kml_path)-> None:
     
     args:
         kml_file: Path
-            Path of the file
+            Path of the file (.kml, or .kmz read through `open_kml`)
+        stream: bool
+            If True, parse with `iter_parse_kml` so the full XML tree is never held in memory.
+        batch_size: int
+            Number of Placemarks per batch when `stream` is True.
     """
-    tree = etree.parse(kml_path)
+    if stream:
+        batches = list(iter_parse_kml(kml_path, batch_size=batch_size))
+        if not batches:
+            return gpd.GeoDataFrame(geometry=[], crs="EPSG:4326")
+        return gpd.GeoDataFrame(pd.concat(batches, ignore_index=True), crs="EPSG:4326")
+
+    with open_kml(kml_path) as source:
+        tree = etree.parse(source)
     root = tree.getroot()
 
     # --- Auto-detect the KML namespace ---
@@ -32,18 +52,14 @@ def parse_kml(kml_path)-> None:
     data = []
 
     # --- iterate through all Placemarks ---
-    for placemark in root.findall(".//k:Placemark", ns):
-
-        record = {}
+    for placemark in root.iterfind(".//k:Placemark", ns):
 
-        # --- name ---
-        record["name"] = placemark.findtext(".//k:name", default=None, namespaces=ns)
+        # --- one walk over the Placemark: name, timestamp, coordinates, SimpleData ---
+        name, when, coords_text, _, simple_data = read_placemark(placemark)
 
-        # --- timestamp (optional) ---
-        record["date_og"] = placemark.findtext(".//k:when", default=None, namespaces=ns)
+        record = {"name": name, "date_og": when}
 
         # --- coordinates ---
-        coords_text = placemark.findtext(".//k:coordinates", default=None, namespaces=ns)
         if coords_text:
             lon, lat, *rest = [float(v) for v in coords_text.split(",")]
             alt = rest[0] if rest else None
@@ -54,10 +70,9 @@ def parse_kml(kml_path)-> None:
             continue
 
         # --- extract ALL SimpleData fields, regardless of schema ---
-        for sd in placemark.findall(".//k:SimpleData", ns):
-            field_name = sd.get("name")
+        for field_name, value in simple_data:
             if field_name:
-                record[field_name] = sd.text
+                record[field_name] = value
 
         data.append(record)
 
@@ -68,6 +83,728 @@ def parse_kml(kml_path)-> None:
     return gdf
 
 
+@lru_cache(maxsize=None)
+def _placemark_tags(ns_prefix: str) -> tuple:
+    """Qualified tags read by `read_placemark`, built once per KML namespace."""
+    return tuple(ns_prefix + tag for tag in ("name", "when", "coordinates", "SchemaData", "SimpleData"))
+
+
+def read_placemark(placemark, schema_url: str = None) -> tuple:
+    """
+    Walk the subtree of a Placemark once and collect everything the KML readers use.
+    Replaces the independent `.//name`, `.//when`, `.//coordinates` and `.//SimpleData`
+    searches, which rescan the subtree each. Tags are compared against the qualified
+    names of the Placemark namespace, so any KML namespace works.
+
+    Returns:
+        (name, when, coordinates, schema_url, simple_data)
+        The first three hold the text of the first match, like `findtext` (None if absent).
+        schema_url is the `schemaUrl` of the first SchemaData and simple_data the list of
+        (field name, text) of every SimpleData, in document order.
+        With `schema_url` (e.g. "#schema1"), like `SchemaData[@schemaUrl=...]//SimpleData`:
+        schema_url is None when the Placemark has no SchemaData with that schemaUrl and
+        simple_data holds only the SimpleData of the first one, not those of other schemas.
+
+    The standalone `pre-processing/preprocess2.py` has a copy of this loop for the KML 2.2
+    namespace: keep both in sync.
+
+    args:
+        placemark: lxml element of the Placemark.
+        schema_url: str
+            schemaUrl of the SchemaData to read. None reads every SimpleData.
+    """
+    tag = placemark.tag
+    name_tag, when_tag, coords_tag, schema_data_tag, simple_data_tag = _placemark_tags(tag[:tag.rfind("}") + 1])
+
+    name = when = coords_text = found_url = schema_data = None
+    simple_data = []
+    for el in placemark.iter():
+        tag = el.tag
+        if tag == simple_data_tag:
+            # document order: the enclosing SchemaData was seen before its SimpleData
+            if schema_url is None or el.getparent() is schema_data:
+                simple_data.append((el.get("name"), el.text))
+        elif tag == name_tag:
+            if name is None:
+                name = el.text or ""
+        elif tag == when_tag:
+            if when is None:
+                when = el.text or ""
+        elif tag == coords_tag:
+            if coords_text is None:
+                coords_text = el.text or ""
+        elif tag == schema_data_tag:
+            if schema_url is None:
+                if found_url is None:
+                    found_url = el.get("schemaUrl")
+            elif schema_data is None and el.get("schemaUrl") == schema_url:
+                schema_data, found_url = el, schema_url
+
+    return name, when, coords_text, found_url, simple_data
+
+
+def iter_parse_kml(kml_path, batch_size: int = 5000, typed: bool = False, categorical: bool = False):
+    """
+    Stream a kml file with `etree.iterparse` and yield the Placemarks as geodataframes.
+    Each Placemark is handled as soon as it closes and is then cleared together with
+    its already processed siblings, so peak memory grows with `batch_size` and not with
+    the size of the file.
+
+    Returns:
+        Generator of gdfs (EPSG:4326) with at most `batch_size` rows each.
+
+    args:
+        kml_path: Path
+            Path of the file
+        batch_size: int
+            Number of Placemarks per yielded gdf.
+        typed: bool
+            If True, SimpleData fields declared as int/float/bool in the <Schema> block
+            are converted while parsing (see `KmlColumns`).
+        categorical: bool
+            If True, string fields with an `avenza:picklist` come out as pandas Categorical.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+
+    columns = KmlColumns(capacity=min(batch_size, 4096), typed=typed, categorical=categorical)
+
+    # `{*}` matches the elements whatever the KML namespace is.
+    # Avenza writes the <Schema> and picklist blocks before the Placemarks.
+    with open_kml(kml_path) as source:
+        for _, elem in etree.iterparse(source, events=("end",), tag=KmlColumns.HEADER_TAGS + ("{*}Placemark",)):
+
+            if not elem.tag.endswith("Placemark"):
+                columns.add_header(elem)
+                continue
+
+            columns.append_placemark(elem)
+            _free_element(elem)
+
+            if len(columns) >= batch_size:
+                yield columns.to_gdf()
+                columns.reset()
+
+    if len(columns):
+        yield columns.to_gdf()
+
+
+def parse_kml_columnar(kml_path, typed: bool = False, categorical: bool = False):
+    """
+    Process kml file into a geodataframe without building a shapely Point and a dict
+    per Placemark. Coordinates are collected in numpy arrays and attributes in per-field
+    lists, and the geometry column is created with one `points_from_xy` call.
+    Same output as `parse_kml` unless `typed` or `categorical` is True. A SimpleData whose
+    lower case name is already a column (`name`, `date_og`, another field) replaces that
+    column, as in `parse_kml`, and the collision is logged.
+
+    Returns:
+        gdf at EPSG:4326.
+
+    args:
+        kml_path: Path
+            Path of the file
+        typed: bool
+            If True, SimpleData fields declared as int/float/bool in the <Schema> block
+            land directly in Int64/float64/boolean columns instead of strings.
+        categorical: bool
+            If True, string fields with an `avenza:picklist` (Nome cientifico, Area,
+            Estagio de vida...) are dictionary encoded into pandas Categorical columns.
+            Values outside the picklist are logged and listed in
+            `gdf.attrs["picklist_outliers"]`.
+    """
+    columns = KmlColumns(typed=typed, categorical=categorical)
+    with open_kml(kml_path) as source:
+        for _, elem in etree.iterparse(source, events=("end",), tag=KmlColumns.HEADER_TAGS + ("{*}Placemark",)):
+            if not elem.tag.endswith("Placemark"):
+                columns.add_header(elem)
+                continue
+            columns.append_placemark(elem)
+            _free_element(elem)
+
+    return columns.to_gdf()
+
+
+@contextmanager
+def open_kml(kml_path):
+    """
+    Open a .kml or .kmz file for the parsers.
+    KMZ archives are recognized by content (uploads are saved as `temp_uploaded.kml`
+    whatever their extension) and their inner KML is streamed from the zip member,
+    without extracting it to disk.
+
+    Yields:
+        Binary file object with the KML document.
+
+    args:
+        kml_path: Path
+            Path of the .kml or .kmz file
+    """
+    if zipfile.is_zipfile(kml_path):
+        with Kmz(kml_path) as kmz, kmz.open_kml() as source:
+            yield source
+    else:
+        with open(kml_path, "rb") as source:
+            yield source
+
+
+class Kmz():
+    """
+    KMZ archive (zip) exported by Avenza or Google Earth.
+    The KML document is `doc.kml` (or else the first .kml of the archive) and is read
+    as a stream. Embedded photos are only listed; their bytes are read on demand.
+    """
+    PHOTO_SUFFIXES = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic")
+
+    def __init__(self, kmz_path):
+        """
+        Args:
+            kmz_path: Path
+                Path of the .kmz file
+        """
+        self.path = Path(kmz_path)
+        self.zip = zipfile.ZipFile(kmz_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.zip.close()
+
+    @property
+    def kml_name(self) -> str:
+        """Name of the KML document inside the archive."""
+        names = [n for n in self.zip.namelist() if n.lower().endswith(".kml")]
+        if not names:
+            raise FileNotFoundError(f"No .kml document inside {self.path.name}")
+        return "doc.kml" if "doc.kml" in names else min(names, key=lambda n: (n.count("/"), n))
+
+    def open_kml(self):
+        """Binary stream of the KML document, decompressed while it is read."""
+        return self.zip.open(self.kml_name)
+
+    @property
+    def photos(self) -> list:
+        """Names of the embedded photo entries (nothing is read)."""
+        return [n for n in self.zip.namelist() if n.lower().endswith(self.PHOTO_SUFFIXES)]
+
+    def open_photo(self, name: str):
+        """Binary stream of the embedded photo `name`."""
+        return self.zip.open(name)
+
+    def read_photo(self, name: str) -> bytes:
+        """Bytes of the embedded photo `name`."""
+        return self.zip.read(name)
+
+
+# KML <SimpleField type=...> -> kind of typed column buffer
+KML_FIELD_TYPES = {
+    "int": "int", "uint": "int", "short": "int", "ushort": "int",
+    "float": "float", "double": "float",
+    "bool": "bool",
+    "string": "str",
+}
+
+
+def read_kml_schema(schema) -> dict:
+    """
+    Read a <Schema> element into a dict of SimpleField name -> kind ("int", "float",
+    "bool" or "str"). Unknown KML types are read as "str".
+    """
+    return {
+        field.get("name"): KML_FIELD_TYPES.get((field.get("type") or "string").lower(), "str")
+        for field in schema.iter("{*}SimpleField")
+        if field.get("name")
+    }
+
+
+def read_avenza_picklist(picklist) -> tuple:
+    """
+    Read an `avenza:picklist` element.
+
+    Returns:
+        (field name, list of allowed values in file order)
+    """
+    tag = picklist.tag
+    avenza_ns = tag[:tag.rfind("}") + 1]
+    values = [value.text.strip() for value in picklist.iter("{*}picklistvalue") if value.text]
+    return picklist.get(avenza_ns + "field"), values
+
+
+def _free_element(elem):
+    """Clear an iterparse element and delete the siblings that were already processed."""
+    elem.clear(keep_tail=True)
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+class KmlColumns():
+    """
+    Columnar buffer of Point Placemarks.
+    lon/lat/alt go to growable numpy arrays, `name`, `date_og` and every SimpleData
+    field to its own list of values (plus the row positions where it is present).
+    With `typed`, fields declared as int/float/bool in the <Schema> go to a `TypedColumn`
+    instead, so their values are converted once, while parsing.
+    With `categorical`, string fields with an Avenza picklist go to a `CategoryColumn`.
+    """
+    # Header elements read before the Placemarks, see `add_header`
+    HEADER_TAGS = ("{*}Schema", "{*}picklist")
+
+    def __init__(self, capacity: int = 1024, typed: bool = False, categorical: bool = False):
+        """
+        Args:
+            capacity: int
+                Initial size of the coordinate arrays. They double when full.
+            typed: bool
+                Convert the fields declared in the schemas given to `add_schema`.
+            categorical: bool
+                Dictionary encode the fields of the picklists given to `add_picklist`.
+        """
+        self.capacity = max(int(capacity), 1)
+        self.typed = typed
+        self.categorical = categorical
+        # SimpleField name -> kind and field name -> picklist values, kept across
+        # `reset` (they are properties of the file)
+        self.field_types = {}
+        self.picklists = {}
+        self.reset()
+
+    def add_header(self, elem):
+        """Register a <Schema> or `avenza:picklist` element."""
+        if elem.tag.endswith("picklist"):
+            self.add_picklist(elem)
+        else:
+            self.add_schema(elem)
+
+    def add_picklist(self, picklist):
+        """Register the allowed values of an `avenza:picklist`. Empty picklists are ignored."""
+        field_name, values = read_avenza_picklist(picklist)
+        if field_name and values:
+            allowed = self.picklists.setdefault(field_name, [])
+            allowed.extend(v for v in values if v not in allowed)
+
+    def add_schema(self, schema):
+        """
+        Register the SimpleField types of a <Schema> element. A field declared with
+        different types by two schemas is kept as string.
+        """
+        for field_name, kind in read_kml_schema(schema).items():
+            if self.field_types.get(field_name, kind) != kind:
+                kind = "str"
+            self.field_types[field_name] = kind
+
+    def reset(self):
+        """Empty the buffer, keeping the allocated coordinate arrays."""
+        if not hasattr(self, "lon"):
+            self.lon = np.empty(self.capacity, dtype="float64")
+            self.lat = np.empty(self.capacity, dtype="float64")
+            self.alt = np.empty(self.capacity, dtype="float64")
+        self.n = 0
+        self.names = []
+        self.dates = []
+        # field name -> (row positions, values) or TypedColumn
+        self.fields = {}
+
+    def __len__(self):
+        return self.n
+
+    def _grow(self):
+        self.capacity *= 2
+        self.lon = np.resize(self.lon, self.capacity)
+        self.lat = np.resize(self.lat, self.capacity)
+        self.alt = np.resize(self.alt, self.capacity)
+        for column in self.fields.values():
+            if isinstance(column, (TypedColumn, CategoryColumn)):
+                column.grow(self.capacity)
+
+    def append_placemark(self, placemark) -> bool:
+        """
+        Append one Placemark element. Placemarks without coordinates are skipped.
+
+        Returns:
+            True if the Placemark was added.
+        """
+        name, when, coords_text, _, simple_data = read_placemark(placemark)
+        if not coords_text:
+            return False
+
+        lon, lat, *rest = coords_text.split(",")
+        if self.n == self.capacity:
+            self._grow()
+        i = self.n
+        self.lon[i] = float(lon)
+        self.lat[i] = float(lat)
+        self.alt[i] = float(rest[0]) if rest else np.nan
+
+        self._append_attributes(i, name, when, simple_data)
+        self.n += 1
+        return True
+
+    def _append_attributes(self, i: int, name, when, simple_data):
+        """Store name, timestamp and SimpleData values of row `i`."""
+        self.names.append(name)
+        self.dates.append(when)
+
+        for field_name, value in simple_data:
+            if not field_name:
+                continue
+            column = self.fields.get(field_name)
+            if column is None:
+                column = self._new_column(field_name)
+                self.fields[field_name] = column
+            if isinstance(column, (TypedColumn, CategoryColumn)):
+                column.set(i, value)
+            else:
+                column[0].append(i)
+                column[1].append(value)
+
+    def _new_column(self, field_name):
+        """Buffer for a field seen for the first time: typed, categorical or plain strings."""
+        kind = self.field_types.get(field_name, "str") if self.typed else "str"
+        if kind != "str":
+            return TypedColumn(kind, self.capacity)
+        if self.categorical and field_name in self.picklists:
+            return CategoryColumn(self.picklists[field_name], self.capacity)
+        return ([], [])
+
+    def to_gdf(self) -> gpd.GeoDataFrame:
+        """
+        Build the gdf (EPSG:4326, lower case columns) of the buffered Placemarks.
+        Values found outside their picklist are logged and stored in
+        `gdf.attrs["picklist_outliers"]` (field -> sorted values).
+        """
+        n = self.n
+        geometry = gpd.points_from_xy(self.lon[:n], self.lat[:n], crs="EPSG:4326")
+        return self._build_gdf(geometry, self.alt[:n].copy())
+
+    def _build_gdf(self, geometry, elevation) -> gpd.GeoDataFrame:
+        """Assemble the gdf of the buffered rows around their geometry and elevation arrays."""
+        n = self.n
+        outliers = {}
+        data = {
+            "name": self.names,
+            "date_og": self.dates,
+            "geometry": geometry,
+            "elevation": elevation,
+        }
+        for field_name, column in self.fields.items():
+            if isinstance(column, CategoryColumn):
+                col = column.to_array(n)
+                if column.outliers:
+                    outliers[field_name.lower()] = sorted(column.outliers)
+                    logger.warning(f"Values outside the picklist of '{field_name}': {sorted(column.outliers)}")
+            elif isinstance(column, TypedColumn):
+                col = column.to_array(n)
+            else:
+                rows, values = column
+                if len(rows) == n:
+                    col = values
+                else:
+                    col = np.full(n, None, dtype=object)
+                    col[rows] = values
+            name = field_name.lower()
+            if name == "geometry":
+                logger.warning(f"SimpleData '{field_name}' has the name of the geometry column, skipping it")
+                continue
+            if name in data:
+                # like `parse_kml`, where the field overwrites the record key
+                logger.warning(f"SimpleData '{field_name}' collides with the column '{name}', replacing it")
+            data[name] = pd.Series(col)
+
+        gdf = gpd.GeoDataFrame(data, geometry="geometry", crs="EPSG:4326")
+        if self.categorical:
+            gdf.attrs["picklist_outliers"] = outliers
+        return gdf
+
+
+def parse_kml_geometries(kml_path, typed: bool = False, categorical: bool = False):
+    """
+    Process a kml file with mixed Point, LineString and Polygon Placemarks (trails and
+    patches of the manejo areas) into a geodataframe.
+    The coordinates of all Placemarks are gathered in one flat array with offset arrays
+    and the geometries are built in bulk with shapely's `from_ragged_array`, instead of
+    splitting each coordinate tuple and building each LineString/Polygon in Python.
+    Takes the same geometry as `parse_kml_with_logging`: the first Point, LineString or
+    Polygon of each Placemark (inner boundaries of polygons included).
+
+    Returns:
+        gdf at EPSG:4326. `elevation` is filled for Points only.
+
+    args:
+        kml_path: Path
+            Path of the file (.kml or .kmz)
+        typed, categorical: bool
+            Same as in `parse_kml_columnar`.
+    """
+    columns = KmlGeometryColumns(typed=typed, categorical=categorical)
+    with open_kml(kml_path) as source:
+        for _, elem in etree.iterparse(source, events=("end",), tag=KmlColumns.HEADER_TAGS + ("{*}Placemark",)):
+            if not elem.tag.endswith("Placemark"):
+                columns.add_header(elem)
+                continue
+            columns.append_placemark(elem)
+            _free_element(elem)
+
+    return columns.to_gdf()
+
+
+def read_placemark_geometry(placemark) -> tuple:
+    """
+    Find the first Point, LineString or Polygon of a Placemark.
+
+    Returns:
+        (geometry type, list of coordinate texts) or (None, []) without geometry.
+        Polygons give the outer ring first, then the inner rings.
+    """
+    geom = next(placemark.iter("{*}Point", "{*}LineString", "{*}Polygon"), None)
+    if geom is None:
+        return None, []
+    kind = geom.tag[geom.tag.rfind("}") + 1:]
+    if kind != "Polygon":
+        return kind, [geom.findtext("{*}coordinates", default="")]
+    rings = [geom.findtext("{*}outerBoundaryIs/{*}LinearRing/{*}coordinates", default="")]
+    rings.extend(c.text or "" for c in geom.iterfind("{*}innerBoundaryIs/{*}LinearRing/{*}coordinates"))
+    return kind, rings
+
+
+class KmlGeometryColumns(KmlColumns):
+    """
+    Columnar buffer of Point, LineString and Polygon Placemarks.
+    Every coordinate ring is kept as its numbers (still text) in one flat list plus
+    (start, number of tuples, dimensions); `to_gdf` converts all numbers at once and
+    builds each geometry type with one `shapely.from_ragged_array` call.
+    """
+    GEOMETRY_TYPES = {"Point": 0, "LineString": 1, "Polygon": 2}
+
+    def reset(self):
+        """Empty the buffer."""
+        super().reset()
+        self.numbers = []
+        # per ring: index of its first number, number of tuples, values per tuple
+        self.ring_start = []
+        self.ring_size = []
+        self.ring_dims = []
+        # per row: geometry type and number of rings
+        self.kinds = []
+        self.ring_count = []
+
+    def append_placemark(self, placemark) -> bool:
+        """
+        Append one Placemark element. Placemarks without a valid geometry are skipped.
+
+        Returns:
+            True if the Placemark was added.
+        """
+        kind, rings = read_placemark_geometry(placemark)
+        if kind is None:
+            return False
+
+        parsed = []
+        for text in rings:
+            n_tuples = len(text.split())
+            numbers = text.replace(",", " ").split()
+            if n_tuples == 0 or len(numbers) % n_tuples:
+                return False
+            parsed.append((numbers, n_tuples, len(numbers) // n_tuples))
+        if not parsed[0][0]:
+            return False
+
+        for numbers, n_tuples, dims in parsed:
+            self.ring_start.append(len(self.numbers))
+            self.ring_size.append(n_tuples)
+            self.ring_dims.append(dims)
+            self.numbers.extend(numbers)
+        self.kinds.append(self.GEOMETRY_TYPES[kind])
+        self.ring_count.append(len(parsed))
+
+        if self.n == self.capacity:
+            self._grow()
+        name, when, _, _, simple_data = read_placemark(placemark)
+        self._append_attributes(self.n, name, when, simple_data)
+        self.n += 1
+        return True
+
+    def to_gdf(self) -> gpd.GeoDataFrame:
+        """Build the gdf (EPSG:4326, lower case columns) of the buffered Placemarks."""
+        n = self.n
+        geometry = np.empty(n, dtype=object)
+        elevation = np.full(n, np.nan)
+        if n == 0:
+            return self._build_gdf(gpd.GeoSeries(geometry, crs="EPSG:4326"), elevation)
+
+        values = np.array(self.numbers, dtype="float64")
+        ring_start = np.asarray(self.ring_start)
+        ring_size = np.asarray(self.ring_size)
+        ring_dims = np.asarray(self.ring_dims)
+        kinds = np.asarray(self.kinds)
+        ring_count = np.asarray(self.ring_count)
+
+        # position in `values` of the lon of every coordinate tuple
+        tuple_ring = np.repeat(np.arange(len(ring_size)), ring_size)
+        first_tuple = np.concatenate(([0], np.cumsum(ring_size)[:-1]))
+        tuple_pos = ring_start[tuple_ring] + (np.arange(len(tuple_ring)) - first_tuple[tuple_ring]) * ring_dims[tuple_ring]
+        coords = np.column_stack((values[tuple_pos], values[tuple_pos + 1]))
+
+        # kind of the row each ring belongs to
+        row_first_ring = np.concatenate(([0], np.cumsum(ring_count)[:-1]))
+        ring_kind = np.repeat(kinds, ring_count)
+        tuple_kind = ring_kind[tuple_ring]
+
+        rows = np.flatnonzero(kinds == 0)
+        if len(rows):
+            first = first_tuple[row_first_ring[rows]]
+            geometry[rows] = shapely.from_ragged_array(shapely.GeometryType.POINT, coords[first])
+            has_z = ring_dims[row_first_ring[rows]] >= 3
+            elevation[rows[has_z]] = values[tuple_pos[first[has_z]] + 2]
+
+        rows = np.flatnonzero(kinds == 1)
+        if len(rows):
+            offsets = np.concatenate(([0], np.cumsum(ring_size[ring_kind == 1])))
+            geometry[rows] = shapely.from_ragged_array(
+                shapely.GeometryType.LINESTRING, coords[tuple_kind == 1], (offsets,)
+            )
+
+        rows = np.flatnonzero(kinds == 2)
+        if len(rows):
+            ring_offsets = np.concatenate(([0], np.cumsum(ring_size[ring_kind == 2])))
+            polygon_offsets = np.concatenate(([0], np.cumsum(ring_count[rows])))
+            geometry[rows] = shapely.from_ragged_array(
+                shapely.GeometryType.POLYGON, coords[tuple_kind == 2], (ring_offsets, polygon_offsets)
+            )
+
+        return self._build_gdf(gpd.GeoSeries(geometry, crs="EPSG:4326"), elevation)
+
+
+class TypedColumn():
+    """
+    Growable numpy buffer of an int, float or bool SimpleData field.
+    Values are converted when set; empty or unparsable values become missing
+    (like `pd.to_numeric(errors="coerce")`). int and bool keep a mask of missing
+    rows and end up as pandas Int64/boolean arrays, float uses NaN.
+    """
+    TRUE_VALUES = {"true", "1", "yes", "sim", "s"}
+    FALSE_VALUES = {"false", "0", "no", "nao", "não", "n"}
+
+    def __init__(self, kind: str, capacity: int):
+        """
+        Args:
+            kind: str
+                "int", "float" or "bool".
+            capacity: int
+                Initial number of rows.
+        """
+        self.kind = kind
+        if kind == "float":
+            self.values = np.full(capacity, np.nan, dtype="float64")
+            self.mask = None
+        else:
+            self.values = np.zeros(capacity, dtype="int64" if kind == "int" else "bool")
+            # True where the value is missing, as in pandas masked arrays
+            self.mask = np.ones(capacity, dtype="bool")
+
+    def grow(self, capacity: int):
+        """Resize to `capacity` rows, new rows are missing."""
+        old = len(self.values)
+        self.values = np.resize(self.values, capacity)
+        if self.mask is None:
+            self.values[old:] = np.nan
+        else:
+            self.mask = np.resize(self.mask, capacity)
+            self.mask[old:] = True
+
+    def set(self, i: int, text):
+        """Convert `text` and store it at row `i`."""
+        if text is None:
+            return
+        text = text.strip()
+        if self.kind == "float":
+            try:
+                self.values[i] = float(text)
+            except ValueError:
+                pass
+        elif self.kind == "int":
+            # OverflowError: the value does not fit in int64, it stays missing
+            try:
+                self.values[i] = int(text)
+            except (ValueError, OverflowError):
+                try:
+                    number = float(text)
+                    if not number.is_integer():
+                        return
+                    self.values[i] = int(number)
+                except (ValueError, OverflowError):
+                    return
+            self.mask[i] = False
+        else:
+            lowered = text.lower()
+            if lowered in self.TRUE_VALUES:
+                self.values[i] = True
+            elif lowered in self.FALSE_VALUES:
+                self.values[i] = False
+            else:
+                return
+            self.mask[i] = False
+
+    def to_array(self, n: int):
+        """Return the first `n` rows as a float64 numpy array or a pandas Int64/boolean array."""
+        if self.kind == "float":
+            return self.values[:n].copy()
+        if self.kind == "int":
+            return pd.arrays.IntegerArray(self.values[:n].copy(), self.mask[:n].copy())
+        return pd.arrays.BooleanArray(self.values[:n].copy(), self.mask[:n].copy())
+
+
+class CategoryColumn():
+    """
+    Dictionary encoded buffer of a string field with an Avenza picklist.
+    Each value is stored as an int32 code into the categories (the picklist values);
+    values outside the picklist are added as extra categories and kept in `outliers`.
+    """
+    def __init__(self, categories: list, capacity: int):
+        """
+        Args:
+            categories: list
+                Allowed values, in picklist order.
+            capacity: int
+                Initial number of rows.
+        """
+        self.categories = list(categories)
+        self.codes_of = {value: code for code, value in enumerate(self.categories)}
+        self.outliers = set()
+        # -1 is a missing value, as in pandas Categorical codes
+        self.codes = np.full(capacity, -1, dtype="int32")
+
+    def grow(self, capacity: int):
+        """Resize to `capacity` rows, new rows are missing."""
+        old = len(self.codes)
+        self.codes = np.resize(self.codes, capacity)
+        self.codes[old:] = -1
+
+    def set(self, i: int, text):
+        """Store the code of `text` at row `i`."""
+        if text is None:
+            return
+        text = text.strip()
+        if not text:
+            return
+        code = self.codes_of.get(text)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(text)
+            self.codes_of[text] = code
+            self.outliers.add(text)
+        self.codes[i] = code
+
+    def to_array(self, n: int) -> pd.Categorical:
+        """Return the first `n` rows as a pandas Categorical."""
+        return pd.Categorical.from_codes(self.codes[:n].copy(), categories=self.categories)
+
+
 
 
 def generate_csv_from_gdf(gdf, DEFAULT_OUTPUT_BASE, target_file_name, target_folder = 'csv'):
@@ -156,7 +893,8 @@ def parse_kml_with_logging(kml_path, log=True):
     - Logs Placemark content (optional)
     """
 
-    tree = etree.parse(kml_path)
+    with open_kml(kml_path) as source:
+        tree = etree.parse(source)
     root = tree.getroot()
 
     # Auto-detect namespace
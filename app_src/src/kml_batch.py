@@ -0,0 +1,154 @@
+import argparse
+import glob
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import geopandas as gpd
+import pandas as pd
+from loguru import logger
+
+from src.func import parse_kml
+
+
+def list_kml_files(source) -> list:
+    """
+    Resolve the input of `parse_kml_files` into a sorted list of paths.
+
+    Args:
+        source: Path, str or list
+            Folder (every .kml/.kmz inside it), glob pattern (`exports/*.kml`) or list of paths.
+    """
+    if isinstance(source, (list, tuple)):
+        return [Path(p) for p in source]
+    source = Path(source)
+    if source.is_dir():
+        return sorted(p for p in source.iterdir() if p.suffix.lower() in (".kml", ".kmz"))
+    return sorted(Path(p) for p in glob.glob(str(source)))
+
+
+def _parse_one(kml_path, parser, parse_kwargs) -> tuple:
+    """Worker: parse one file and return (path, gdf or None, seconds, error or None)."""
+    t0 = time.perf_counter()
+    try:
+        gdf = parser(kml_path, **parse_kwargs)
+        return kml_path, gdf, time.perf_counter() - t0, None
+    except Exception as e:
+        return kml_path, None, time.perf_counter() - t0, f"{type(e).__name__}: {e}"
+
+
+def _parse_isolated(kml_path, parser, parse_kwargs) -> tuple:
+    """
+    Parse one file in a pool of its own, so a worker that dies (crash, out of memory) only
+    fails this file. Same result tuple as `_parse_one`.
+    """
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        try:
+            return pool.submit(_parse_one, kml_path, parser, parse_kwargs).result()
+        except Exception as e:
+            return kml_path, None, time.perf_counter() - t0, f"{type(e).__name__}: {e}"
+
+
+def parse_kml_files(source, parser=parse_kml, max_workers: int = None, **parse_kwargs) -> tuple:
+    """
+    Parse many KML/KMZ exports (one per device) in a process pool and concatenate them.
+    A file that fails is reported and skipped, the rest of the batch goes on. This includes
+    a worker process that dies: the files of the broken pool are retried one per process, and
+    the one that kills its worker again is reported like a parse failure.
+
+    Returns:
+        (gdf, report)
+        gdf: all the Placemarks at EPSG:4326 with a `source_file` column (file name).
+        report: DataFrame with source_file, rows, seconds and error for each file.
+
+    Args:
+        source: Path, str or list
+            Folder, glob pattern or list of files, see `list_kml_files`.
+        parser: callable
+            KML parser of `src.func` (must be a module level function). Default `parse_kml`.
+        max_workers: int
+            Number of processes. Default: number of CPUs. 1 parses in the current process.
+        parse_kwargs:
+            Options given to the parser.
+    """
+    files = list_kml_files(source)
+    if not files:
+        raise FileNotFoundError(f"No .kml/.kmz files found for: {source}")
+
+    logger.info(f"Parsing {len(files)} KML files")
+    t0 = time.perf_counter()
+    results = []
+    if max_workers == 1 or len(files) == 1:
+        results = [_parse_one(p, parser, parse_kwargs) for p in files]
+    else:
+        broken = []
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(_parse_one, p, parser, parse_kwargs): p for p in files}
+            for f in as_completed(futures):
+                try:
+                    results.append(f.result())
+                except BrokenProcessPool:
+                    # a worker died: every file still pending in this pool fails with it
+                    broken.append(futures[f])
+                except Exception as e:
+                    results.append((futures[f], None, 0.0, f"{type(e).__name__}: {e}"))
+        if broken:
+            logger.warning(f"A worker process died, parsing {len(broken)} files again one per process")
+            results.extend(_parse_isolated(p, parser, parse_kwargs) for p in broken)
+
+    # keep the input order in the output, whatever the completion order was
+    order = {p: i for i, p in enumerate(files)}
+    results.sort(key=lambda r: order[r[0]])
+
+    gdfs = []
+    report = []
+    for kml_path, gdf, seconds, error in results:
+        if error is None:
+            gdf["source_file"] = kml_path.name
+            gdfs.append(gdf)
+            logger.info(f"{kml_path.name}: {len(gdf)} records in {seconds:.2f}s")
+        else:
+            logger.error(f"{kml_path.name}: failed after {seconds:.2f}s - {error}")
+        report.append({
+            "source_file": kml_path.name,
+            "rows": len(gdf) if gdf is not None else 0,
+            "seconds": round(seconds, 3),
+            "error": error,
+        })
+    report = pd.DataFrame(report)
+
+    n_failed = int(report["error"].notna().sum())
+    logger.success(f"Parsed {len(gdfs)}/{len(files)} files ({n_failed} failed) in {time.perf_counter() - t0:.2f}s")
+
+    if not gdfs:
+        return gpd.GeoDataFrame({"source_file": []}, geometry=[], crs="EPSG:4326"), report
+    gdf = gpd.GeoDataFrame(pd.concat(gdfs, ignore_index=True), geometry="geometry", crs="EPSG:4326")
+    return gdf, report
+
+
+def main(args):
+    gdf, report = parse_kml_files(args.source, max_workers=args.workers)
+    print(report.to_string(index=False))
+
+    if args.output and len(gdf):
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        gdf.to_file(output, driver="GPKG")
+        logger.success(f"{len(gdf)} records saved to {output}")
+
+    return 1 if report["error"].notna().any() else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Leitura em lote dos KML/KMZ exportados pelo Avenza (uma pasta ou um glob)"
+    )
+    parser.add_argument("source", type=str, help="Pasta ou padrao glob dos arquivos, ex: 'exemplo/*.kml'")
+    parser.add_argument("--workers", type=int, default=None, help="Numero de processos (default: numero de CPUs)")
+    parser.add_argument("--output", type=str, default=None, help="GPKG de saida com todos os registros")
+    args = parser.parse_args()
+
+    sys.exit(main(args))
@@ -0,0 +1,102 @@
+import hashlib
+import os
+from pathlib import Path
+
+import geopandas as gpd
+from loguru import logger
+
+from src.func import PARSER_VERSION, parse_kml
+
+
+class KmlCache():
+    """
+    On-disk cache of parsed KML files.
+    Entries are GeoParquet files named after the SHA-256 of the KML bytes, the parser
+    version and the parser options, so re-uploading the same file (whatever its name)
+    skips the parsing. The folder is kept under `max_bytes` by deleting the least
+    recently used entries.
+    """
+    def __init__(self, cache_dir, max_bytes: int = 512 * 1024**2):
+        """
+        Args:
+            cache_dir: Path
+                Folder of the cache entries, created if missing.
+            max_bytes: int
+                Size limit of the folder. Default 512 MB.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, kml_path, parser=parse_kml, **parse_kwargs) -> str:
+        """SHA-256 of the file content, the parser version, the parser and its options."""
+        h = hashlib.sha256()
+        h.update(f"{PARSER_VERSION}|{parser.__name__}|{sorted(parse_kwargs.items())}|".encode())
+        with open(kml_path, "rb") as f:
+            h.update(hashlib.file_digest(f, "sha256").digest())
+        return h.hexdigest()
+
+    def path(self, key: str) -> Path:
+        """GeoParquet file of the entry `key`."""
+        return self.cache_dir / f"{key}.parquet"
+
+    def get(self, key: str):
+        """Return the cached gdf of `key`, or None. A hit marks the entry as recently used."""
+        entry = self.path(key)
+        if not entry.exists():
+            return None
+        try:
+            gdf = gpd.read_parquet(entry)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {entry.name}: {e}")
+            entry.unlink(missing_ok=True)
+            return None
+        os.utime(entry)
+        return gdf
+
+    def put(self, key: str, gdf: gpd.GeoDataFrame):
+        """Store `gdf` under `key` and evict old entries. Failures only log a warning."""
+        entry = self.path(key)
+        tmp = entry.with_suffix(".tmp")
+        try:
+            gdf.to_parquet(tmp)
+            os.replace(tmp, entry)
+        except Exception as e:
+            tmp.unlink(missing_ok=True)
+            logger.warning(f"Could not cache parsed KML: {e}")
+            return
+        self.evict()
+
+    def evict(self):
+        """Delete the least recently used entries until the folder fits in `max_bytes`."""
+        entries = [(p.stat(), p) for p in self.cache_dir.glob("*.parquet")]
+        total = sum(st.st_size for st, _ in entries)
+        for st, entry in sorted(entries, key=lambda e: e[0].st_mtime):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= st.st_size
+            logger.debug(f"Evicted cache entry {entry.name}")
+
+    def parse(self, kml_path, parser=parse_kml, **parse_kwargs) -> gpd.GeoDataFrame:
+        """
+        Return the parsed gdf of `kml_path`, from the cache when the same content was
+        already parsed with the same parser and options.
+
+        Args:
+            kml_path: Path
+                Path of the KML file.
+            parser: callable
+                KML parser of `src.func`. Default `parse_kml`.
+            parse_kwargs:
+                Options given to the parser.
+        """
+        key = self.key(kml_path, parser, **parse_kwargs)
+        gdf = self.get(key)
+        if gdf is not None:
+            logger.info(f"Parsed KML loaded from cache ({key[:12]})")
+            return gdf
+
+        gdf = parser(kml_path, **parse_kwargs)
+        self.put(key, gdf)
+        return gdf
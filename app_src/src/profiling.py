@@ -0,0 +1,90 @@
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from loguru import logger
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak RSS is reported as None
+    resource = None
+
+
+def peak_rss_mb():
+    """High-water mark of the resident memory of this process, in MB (None if unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+class StageProfiler():
+    """
+    Collect wall time, CPU time, peak RSS growth and rows/sec per pipeline stage.
+    A stage entered several times (e.g. once per batch in chunked mode) is accumulated:
+    times and rows are summed, the RSS growth keeps its maximum.
+    """
+    def __init__(self, **metadata):
+        """
+        Args:
+            metadata: dict
+                Extra fields written at the top of the JSON record (file, type, mode...).
+        """
+        self.metadata = metadata
+        self.stages = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, rows: int):
+        """Measure the block as the stage `name`, processing `rows` rows."""
+        rss_before = peak_rss_mb()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall0
+            cpu = time.process_time() - cpu0
+            rss_after = peak_rss_mb()
+            rss_delta = None if rss_before is None else rss_after - rss_before
+
+            entry = self.stages.setdefault(name, {"stage": name, "calls": 0, "rows": 0, "wall_s": 0.0,
+                                                  "cpu_s": 0.0, "peak_rss_delta_mb": rss_delta})
+            entry["calls"] += 1
+            entry["rows"] += rows
+            entry["wall_s"] += wall
+            entry["cpu_s"] += cpu
+            if rss_delta is not None:
+                entry["peak_rss_delta_mb"] = max(entry["peak_rss_delta_mb"] or 0.0, rss_delta)
+            logger.debug(f"[profile] {name}: {wall:.3f}s wall, {cpu:.3f}s cpu, {rows} rows")
+
+    def record(self) -> dict:
+        """Structured record of the run: metadata, totals and one entry per stage."""
+        stages = []
+        for entry in self.stages.values():
+            entry = dict(entry)
+            entry["rows_per_s"] = entry["rows"] / entry["wall_s"] if entry["wall_s"] > 0 else None
+            stages.append(entry)
+        return {
+            **self.metadata,
+            "total_wall_s": time.perf_counter() - self._start,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stages,
+        }
+
+    def write(self, path) -> Path:
+        """Write the record as JSON to `path` and return it."""
+        path = Path(path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.record(), f, indent=2, default=str)
+        logger.info(f"Profile written to: {path}")
+        return path
+
+
+def maybe_stage(profiler, name: str, rows: int):
+    """`profiler.stage(name, rows)`, or a no-op context when profiling is off (`profiler` is None)."""
+    if profiler is None:
+        return nullcontext()
+    return profiler.stage(name, rows)
@@ -0,0 +1,98 @@
+"""
+Time of day as seconds since midnight.
+Avenza forms carry clock times as `HH:MM` / `HH:MM:SS` text (manejo `inicio`/`fim`).
+They are parsed once into integer seconds with pyarrow kernels, kept as integers through
+the pipeline, and converted to `time` values only when they are written out.
+"""
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+TIME_PATTERN = r"^\s*(?P<h>\d{1,2}):(?P<m>\d{2})(?::(?P<s>\d{2}))?\s*$"
+SECONDS_PER_DAY = 24 * 3600
+
+
+def _to_series(seconds: pa.Array, index) -> pd.Series:
+    """Nullable Int32 series from an int32 Arrow array."""
+    return pd.Series(pd.Int32Dtype().__from_arrow__(seconds), index=index)
+
+
+def parse_time_of_day(values: pd.Series) -> pd.Series:
+    """
+    Parse clock times into seconds since midnight, in one vectorized pass.
+
+    Args:
+        values: pd.Series
+            `HH:MM[:SS]` strings, or already time-like values (timedelta64, datetime64,
+            Arrow time, datetime.time objects).
+
+    Returns:
+        pd.Series of nullable Int32. Missing or invalid values (e.g. `25:00`) are NA.
+    """
+    if pd.api.types.is_timedelta64_dtype(values):
+        return (values.dt.total_seconds() % SECONDS_PER_DAY).astype("Int32")
+    if pd.api.types.is_datetime64_any_dtype(values) and not isinstance(values.dtype, pd.ArrowDtype):
+        return (values.dt.hour * 3600 + values.dt.minute * 60 + values.dt.second).astype("Int32")
+    if isinstance(values.dtype, pd.ArrowDtype) and pa.types.is_time(values.dtype.pyarrow_dtype):
+        return _to_series(time_to_seconds(pa.array(values)), values.index)
+    if pd.api.types.is_integer_dtype(values):
+        # already seconds
+        return values.astype("Int32")
+
+    # text (datetime.time objects are formatted as HH:MM:SS by astype)
+    text = pa.array(values.astype("string"), type=pa.string(), from_pandas=True)
+    parts = pc.extract_regex(text, TIME_PATTERN)
+    # struct_field keeps the struct nulls (values that did not match)
+    hours = pc.cast(pc.struct_field(parts, "h"), pa.int32())
+    minutes = pc.cast(pc.struct_field(parts, "m"), pa.int32())
+    sec_text = pc.struct_field(parts, "s")
+    # `HH:MM`: the optional seconds group comes back empty
+    secs = pc.cast(pc.if_else(pc.equal(sec_text, ""), "0", sec_text), pa.int32())
+
+    valid = pc.and_(pc.and_(pc.less(hours, 24), pc.less(minutes, 60)), pc.less(secs, 60))
+    seconds = pc.add(pc.add(pc.multiply(hours, 3600), pc.multiply(minutes, 60)), secs)
+    seconds = pc.if_else(valid, seconds, pa.scalar(None, pa.int32()))
+    return _to_series(seconds, values.index)
+
+
+def time_to_seconds(times: pa.Array) -> pa.Array:
+    """Arrow time32/time64 array -> int32 seconds since midnight."""
+    if times.type != pa.time32("s"):
+        # time64[us] or time32[ms]: drop the sub-second part
+        times = times.cast(pa.time32("s"), safe=False)
+    return times.cast(pa.int32())
+
+
+def seconds_to_arrow_time(seconds: pd.Series) -> pd.Series:
+    """Seconds since midnight -> `pd.ArrowDtype(time32[s])` column."""
+    arr = pa.array(seconds.astype("Int32"), type=pa.int32(), from_pandas=True).cast(pa.time32("s"))
+    return pd.Series(pd.arrays.ArrowExtensionArray(arr), index=seconds.index, name=seconds.name)
+
+
+def format_time_of_day(seconds: pd.Series) -> pd.Series:
+    """
+    Seconds since midnight -> `HH:MM:SS` text (NA stays NA), the layout `db_importer.py` reads.
+    Used at the file boundary only.
+    """
+    arr = pa.array(seconds.astype("Int32"), type=pa.int32(), from_pandas=True)
+    stamps = pc.cast(pc.cast(arr, pa.int64()), pa.timestamp("s"))
+    text = pc.strftime(stamps, format="%H:%M:%S")
+    return pd.Series(text.to_pandas(), index=seconds.index, name=seconds.name)
+
+
+def seconds_to_time(seconds: pd.Series) -> pd.Series:
+    """
+    Seconds since midnight -> `datetime.time` objects (None for NA), the values the database
+    driver expects. Used at the DB boundary only.
+    """
+    arr = pa.array(seconds.astype("Int32"), type=pa.int32(), from_pandas=True).cast(pa.time32("s"))
+    return pd.Series(arr.to_pandas(), index=seconds.index, name=seconds.name, dtype=object)
+
+
+def duration_seconds(start: pd.Series, end: pd.Series) -> pd.Series:
+    """
+    Duration `end - start` in seconds, wrapping past midnight (22:00 -> 01:00 is 3h).
+    Both sides are parsed with `parse_time_of_day`, NA on either side gives NA.
+    """
+    start, end = parse_time_of_day(start), parse_time_of_day(end)
+    return ((end - start) % SECONDS_PER_DAY).astype("Int32")
@@ -0,0 +1,204 @@
+import json
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from loguru import logger
+
+from src.timeofday import parse_time_of_day
+
+# NOT NULL columns of database/create_db.sql (id and the timestamps are filled by the importer/DB)
+NOT_NULL = {
+    "ocorrencia": ("date", "time", "especie", "individuos", "geom"),
+    "manejo": ("date", "time", "especie", "individuos", "geom"),
+}
+
+# Estação Ecológica de Carijós (Ratones and Saco Grande units) with a margin, EPSG:4326
+CARIJOS_BBOX = (-48.56, -27.58, -48.44, -27.42)
+
+# Inclusive (min, max) of the numeric columns, None for no limit
+RANGES = {
+    "ocorrencia": {
+        "individuos": (0, None),
+        "nivel_prioridade": (0, 5),
+        "risco_invasao": (1, 3),
+        "estagio_invasao": (0, 3),
+        "zona": (1, None),
+    },
+    "manejo": {
+        "individuos": (0, None),
+        "zona": (1, None),
+        "plantulas_rev": (0, None),
+        "jovens_rev": (0, None),
+        "adultos_rev": (0, None),
+        "quimic_concentr": (0, None),
+        "quimic_l": (0, None),
+        "duracao": (0, 24 * 3600 - 1),
+        "num_manej": (0, None),
+        "num_equipe": (0, None),
+        "custo": (0, None),
+    },
+}
+
+# Picklist values of the Avenza forms, after `clean_codes`
+ENUMS = {
+    "ocorrencia": {
+        "grau_dispersao": ("A", "B", "C"),
+    },
+    "manejo": {
+        "grau_dispersao": ("A", "B", "C"),
+    },
+}
+
+# postgres type of the column -> how its text must parse
+INTEGER_TYPES = ("integer", "bigint", "smallint")
+NUMERIC_TYPES = INTEGER_TYPES + ("numeric", "real", "double precision")
+TIME_TYPES = ("time without time zone", "time with time zone")
+
+
+def is_missing(values: pd.Series) -> np.ndarray:
+    """NA values, and empty or blank text."""
+    missing = values.isna().to_numpy()
+    if values.dtype == object or pd.api.types.is_string_dtype(values):
+        missing = missing | (values.astype("string").str.strip() == "").fillna(False).to_numpy(dtype=bool)
+    return missing
+
+
+class ValidationReport():
+    """
+    Row-level result of `validate_gdf`: one boolean column per failed check
+    (`not_null:<col>`, `type:<col>`, `range:<col>`, `enum:<col>`, `bbox`), True where the row fails.
+    Checks without failures are not kept, so a clean file gives an empty report.
+    """
+    def __init__(self, failures: pd.DataFrame, table: str = ""):
+        """
+        Args:
+            failures: pd.DataFrame
+                Boolean masks of the checks, indexed like the validated gdf.
+            table: str
+                Validated table, written in the record.
+        """
+        self.failures = failures
+        self.table = table
+
+    @property
+    def invalid(self) -> np.ndarray:
+        """Mask of the rows failing at least one check."""
+        return self.failures.to_numpy().any(axis=1) if self.failures.shape[1] else np.zeros(len(self.failures), dtype=bool)
+
+    def summary(self) -> dict:
+        """Number of failing rows per check."""
+        return {check: int(mask.sum()) for check, mask in self.failures.items()}
+
+    def record(self) -> dict:
+        """Totals, failures per check and the positions of the failing rows per check."""
+        return {
+            "table": self.table,
+            "rows": len(self.failures),
+            "invalid_rows": int(self.invalid.sum()),
+            "checks": self.summary(),
+            "failed_rows": {check: np.flatnonzero(mask.to_numpy()).tolist() for check, mask in self.failures.items()},
+        }
+
+    def write(self, path) -> Path:
+        """Write the record as JSON to `path` and return it."""
+        path = Path(path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.record(), f, indent=2)
+        logger.info(f"Validation report written to: {path}")
+        return path
+
+
+def validate_gdf(gdf: gpd.GeoDataFrame, table: str, pg_schema: dict = None, not_null=None,
+                 bbox=CARIJOS_BBOX) -> ValidationReport:
+    """
+    Vectorized data-quality checks of a processed gdf before it is imported into `table`,
+    so bad rows are found without a failed DB round trip.
+
+    Args:
+        gdf: gpd.GeoDataFrame
+            Processed records, as read from the preprocessing output.
+        table: str
+            Destination table, selects the RANGES and ENUMS rules.
+        pg_schema: dict
+            Column -> postgres type of the table (`DataImporter.get_cols_dtypes`). Numeric,
+            date and time columns must then parse as such. Default None, no type checks.
+        not_null: iterable
+            Required columns. Default the NOT_NULL columns of `table`.
+        bbox: tuple
+            (minx, miny, maxx, maxy) in EPSG:4326 the geometries must fall in. None to skip.
+
+    Returns:
+        ValidationReport
+    """
+    checks = {}
+    geometry = gdf.geometry
+    not_null = NOT_NULL.get(table, ()) if not_null is None else not_null
+
+    for col in not_null:
+        if col in ("geom", geometry.name):
+            checks["not_null:geom"] = (geometry.isna() | geometry.is_empty).to_numpy()
+        elif col in gdf.columns:
+            checks[f"not_null:{col}"] = is_missing(gdf[col])
+        else:
+            checks[f"not_null:{col}"] = np.ones(len(gdf), dtype=bool)
+
+    # present values that the DB would not accept for the column type
+    numbers = {}
+    for col, pg_type in (pg_schema or {}).items():
+        if col not in gdf.columns or col == geometry.name:
+            continue
+        values = gdf[col]
+        present = ~is_missing(values)
+        if pg_type in NUMERIC_TYPES:
+            parsed = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+            bad = np.isnan(parsed)
+            if pg_type in INTEGER_TYPES:
+                bad |= np.mod(parsed, 1) != 0
+            numbers[col] = parsed
+        elif pg_type == "date":
+            bad = pd.to_datetime(values, errors="coerce", format="ISO8601").isna().to_numpy()
+        elif pg_type in TIME_TYPES:
+            bad = parse_time_of_day(values).isna().to_numpy()
+        else:
+            continue
+        checks[f"type:{col}"] = present & bad
+
+    for col, (low, high) in RANGES.get(table, {}).items():
+        if col not in gdf.columns:
+            continue
+        values = numbers.get(col)
+        if values is None:
+            values = pd.to_numeric(gdf[col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        # NaN compares False: missing values are left to the not_null checks
+        out = np.zeros(len(gdf), dtype=bool)
+        if low is not None:
+            out |= values < low
+        if high is not None:
+            out |= values > high
+        checks[f"range:{col}"] = out
+
+    for col, allowed in ENUMS.get(table, {}).items():
+        if col not in gdf.columns:
+            continue
+        values = gdf[col]
+        checks[f"enum:{col}"] = ~is_missing(values) & ~values.isin(allowed).to_numpy()
+
+    if bbox is not None:
+        if gdf.crs is not None and not gdf.crs.equals("EPSG:4326"):
+            geometry = geometry.to_crs("EPSG:4326")
+        bounds = shapely.bounds(geometry.values)
+        minx, miny, maxx, maxy = bbox
+        # NaN bounds (missing/empty geometry) are left to not_null:geom
+        checks["bbox"] = ((bounds[:, 0] < minx) | (bounds[:, 1] < miny)
+                          | (bounds[:, 2] > maxx) | (bounds[:, 3] > maxy))
+
+    failures = pd.DataFrame({check: mask for check, mask in checks.items() if mask.any()}, index=gdf.index)
+    report = ValidationReport(failures, table)
+    if failures.shape[1]:
+        logger.warning(f"Validation: {int(report.invalid.sum())} of {len(gdf)} rows fail: {report.summary()}")
+    else:
+        logger.info(f"Validation: all {len(gdf)} rows passed")
+    return report
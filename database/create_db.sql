@@ -10,7 +10,7 @@ DROP TABLE IF EXISTS "ocorrencia";
 
 -- create table manejo
 CREATE TABLE "manejo" (
-  "id" integer NOT NULL,
+  "id" integer GENERATED BY DEFAULT AS IDENTITY,
   "name" varchar, 
   "elevation" decimal,
   "date" date NOT NULL,
@@ -30,6 +30,7 @@ CREATE TABLE "manejo" (
   "quimic_l" decimal,
   "inicio" time,
   "fim" time,
+  "duracao" integer,
   "num_manej" integer,
   "num_equipe" integer,
   "custo" decimal,
@@ -44,7 +45,7 @@ CREATE TABLE "manejo" (
 
 -- create table ocorrencia
 CREATE TABLE "ocorrencia" (
-  "id" integer NOT NULL,
+  "id" integer GENERATED BY DEFAULT AS IDENTITY,
   "name" varchar(255),
   "elevation" decimal,
   "date" date NOT NULL,
@@ -0,0 +1,4 @@
+-- Duration of the action in seconds (fim - inicio), written by preprocess.py for manejo,
+-- on databases created before the column was added to create_db.sql. Run once.
+
+ALTER TABLE "manejo" ADD COLUMN IF NOT EXISTS "duracao" integer;
@@ -0,0 +1,9 @@
+-- Server-side id allocation for databases created before the identity columns of create_db.sql.
+-- The importer then leaves "id" to the table sequence instead of numbering from MAX(id),
+-- so concurrent imports do not collide on the primary key. Run once.
+
+ALTER TABLE "manejo" ALTER COLUMN "id" ADD GENERATED BY DEFAULT AS IDENTITY;
+SELECT setval(pg_get_serial_sequence('"manejo"', 'id'), COALESCE(MAX("id"), 0) + 1, false) FROM "manejo";
+
+ALTER TABLE "ocorrencia" ALTER COLUMN "id" ADD GENERATED BY DEFAULT AS IDENTITY;
+SELECT setval(pg_get_serial_sequence('"ocorrencia"', 'id'), COALESCE(MAX("id"), 0) + 1, false) FROM "ocorrencia";
@@ -0,0 +1,20 @@
+-- Natural key of the records, needed by `db_importer.py --mode upsert` (INSERT ... ON CONFLICT).
+-- Opt-in: create_db.sql does not have it. With it, an append import (the default) fails on any
+-- record already in the table, or repeated within the file. Run once.
+--
+-- The geometry enters the key as md5(ST_AsEWKB("geom")): a btree on the raw geometry stores it
+-- whole, and large polygons exceed the maximum size of an index row. db_importer.py uses the same
+-- expression as its ON CONFLICT target.
+
+-- Rows sharing a key must be removed first, or the index cannot be created. List them with:
+-- SELECT "date", "time", "especie", array_agg("id" ORDER BY "id")
+--     FROM "ocorrencia" GROUP BY "date", "time", "especie", md5(ST_AsEWKB("geom")) HAVING COUNT(*) > 1;
+
+-- UNIQUE constraint on the raw geometry of earlier versions of create_db.sql and of this script
+ALTER TABLE "manejo" DROP CONSTRAINT IF EXISTS "manejo_natural_key";
+ALTER TABLE "ocorrencia" DROP CONSTRAINT IF EXISTS "ocorrencia_natural_key";
+
+CREATE UNIQUE INDEX IF NOT EXISTS "manejo_natural_key"
+    ON "manejo" ("date", "time", "especie", md5(ST_AsEWKB("geom")));
+CREATE UNIQUE INDEX IF NOT EXISTS "ocorrencia_natural_key"
+    ON "ocorrencia" ("date", "time", "especie", md5(ST_AsEWKB("geom")));
@@ -30,4 +30,11 @@ VALUES
 (7, 'Manejo G', 210.0, '2025-06-20', '08:00:00', 'remoção mecânica', 3, 'Pinus sp.', 'parcial', 15, 0, 0, 15, 'mecânico', 'corte raso', NULL, NULL, NULL, '08:00:00', '17:00:00', 5, 8, 1200.00, ST_GeomFromText('POINT(-48.1500 -27.5900)', 4326), 'Equipe grande necessária', 'Declividade alta'),
 (8, 'Manejo H', 32.0, '2025-07-12', '10:00:00', 'monitoramento', 2, 'Melinis repens', 'não removido', 0, 0, 0, 0, NULL, NULL, NULL, NULL, NULL, '10:00:00', '11:00:00', 1, 2, 100.00, ST_GeomFromText('POINT(-48.1050 -27.5350)', 4326), 'Vistoria pós-fogo', 'Recuperação natural'),
 (9, 'Manejo I', 88.0, '2025-08-05', '08:30:00', 'remoção manual', 2, 'Tradescantia zebrina', 'em andamento', 50, 50, 0, 0, 'manual', 'rastelagem', NULL, NULL, NULL, '08:30:00', '12:00:00', 2, 4, 300.00, ST_GeomFromText('POINT(-48.1400 -27.5800)', 4326), 'Mão de obra voluntária', 'Projeto Restauro'),
-(10, 'Manejo J', 5.5, '2025-09-01', '14:00:00', 'aplicação química', 1, 'Urochloa maxima', 'concluído', 10, 0, 0, 10, 'químico', 'pulverização', 'Glyphosate', 4.0, 2.5, '14:00:00', '16:30:00', 3, 3, 480.00, ST_GeomFromText('POINT(-48.1000 -27.5400)', 4326), 'Controle de gramínea', 'Preparação para plantio');
\ No newline at end of file
+(10, 'Manejo J', 5.5, '2025-09-01', '14:00:00', 'aplicação química', 1, 'Urochloa maxima', 'concluído', 10, 0, 0, 10, 'químico', 'pulverização', 'Glyphosate', 4.0, 2.5, '14:00:00', '16:30:00', 3, 3, 480.00, ST_GeomFromText('POINT(-48.1000 -27.5400)', 4326), 'Controle de gramínea', 'Preparação para plantio');
+
+--- 
+--- The samples have explicit ids: move the identity sequences past them
+---
+
+SELECT setval(pg_get_serial_sequence('"ocorrencia"', 'id'), (SELECT MAX("id") FROM "ocorrencia"));
+SELECT setval(pg_get_serial_sequence('"manejo"', 'id'), (SELECT MAX("id") FROM "manejo"));
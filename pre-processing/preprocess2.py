@@ -30,6 +30,53 @@ def create_logger(file_name: Path, logger_dir = Path("output/logger")):
         compression="zip"  # Compress old logs
     )
 
+# Qualified tags read from each Placemark, built once for the KML namespace
+KML_NS = "{http://www.opengis.net/kml/2.2}"
+PLACEMARK_TAGS = tuple(KML_NS + tag for tag in ("name", "when", "coordinates", "SchemaData", "SimpleData"))
+
+def read_placemark(placemark, schema_url=None):
+    """
+    Walk the subtree of a Placemark once, instead of one `.//` search per element.
+
+    Returns:
+        (name, when, coordinates, schema_url, simple_data)
+        Text of the first name/when/coordinates (None if absent), schemaUrl of the first
+        SchemaData and the list of (field name, text) of every SimpleData.
+        With `schema_url`, only the SimpleData of the first SchemaData with that schemaUrl
+        (schema_url is None when the Placemark has none).
+
+    This script runs standalone, outside of `app_src`, so the loop is a copy of
+    `app_src/src/func.py:read_placemark` (which also resolves the namespace per file):
+    keep both in sync.
+    """
+    name_tag, when_tag, coords_tag, schema_data_tag, simple_data_tag = PLACEMARK_TAGS
+
+    name = when = coords_text = found_url = schema_data = None
+    simple_data = []
+    for el in placemark.iter():
+        tag = el.tag
+        if tag == simple_data_tag:
+            # document order: the enclosing SchemaData was seen before its SimpleData
+            if schema_url is None or el.getparent() is schema_data:
+                simple_data.append((el.get("name"), el.text))
+        elif tag == name_tag:
+            if name is None:
+                name = el.text or ""
+        elif tag == when_tag:
+            if when is None:
+                when = el.text or ""
+        elif tag == coords_tag:
+            if coords_text is None:
+                coords_text = el.text or ""
+        elif tag == schema_data_tag:
+            if schema_url is None:
+                if found_url is None:
+                    found_url = el.get("schemaUrl")
+            elif schema_data is None and el.get("schemaUrl") == schema_url:
+                schema_data, found_url = el, schema_url
+
+    return name, when, coords_text, found_url, simple_data
+
 def parse_kml(kml_file):
     """
     Process kml file into a geodataframe.
@@ -55,28 +102,19 @@ def parse_kml(kml_file):
 
         # Extract placemarks with schema1 data
         data = []
-        for placemark in root.findall('.//kml:Placemark', ns):
-            schema_data = placemark.find('.//kml:SchemaData[@schemaUrl="#schema1"]', ns)
-            if schema_data is not None:
+        for placemark in root.iterfind('.//kml:Placemark', ns):
+            # One walk over the Placemark instead of a search per element
+            name, timestamp, coords_text, schema_url, simple_data = read_placemark(placemark, schema_url="#schema1")
+            if schema_url == "#schema1":
                 # Get coordinates
-                coords_text = placemark.find('.//kml:coordinates', ns).text.strip()
-                lon, lat, alt = map(float, coords_text.split(','))
-                
-                # Get name
-                name = placemark.find('.//kml:name', ns).text
-                
-                # Get timestamp if available
-                timestamp_elem = placemark.find('.//kml:when', ns)
-                timestamp = timestamp_elem.text if timestamp_elem is not None else None
+                lon, lat, alt = map(float, coords_text.strip().split(','))
                 
                 # Extract all SimpleData fields
                 record = {'name': name,
                         'geometry': Point(lon, lat),
                         'elevation':alt,
                         "date_og":timestamp}
-                for simple_data in schema_data.findall('.//kml:SimpleData', ns):
-                    field_name = simple_data.get('name')
-                    field_value = simple_data.text
+                for field_name, field_value in simple_data:
                     record[field_name] = field_value
                 
                 data.append(record)